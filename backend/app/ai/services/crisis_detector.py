@@ -1,5 +1,6 @@
 # backend/app/ai/services/crisis_detector.py
 import re, json, logging
+from functools import lru_cache
 from typing import Dict, List
 from datetime import datetime,timezone
 
@@ -7,7 +8,7 @@ import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
 from textblob import TextBlob
 
-from app.crypto.identity import AnonymousIdentity
+from app.crypto.identity import get_identity
 
 
 # ------------------------------------------------------------------ #
@@ -58,7 +59,7 @@ class CrisisDetector:
              "overwhelmed", "tired of everything"]
         )
         # Crypto helper for encryption / decryption
-        self._identity  = AnonymousIdentity()
+        self._identity  = get_identity()
         # Logging
         self._log       = logging.getLogger(__name__)
 
@@ -226,3 +227,9 @@ class CrisisDetector:
             "recommendations": ["Analysis failed, please try again."],
             "analyzed_at": datetime.utcnow().isoformat(),
         }
+
+
+@lru_cache(maxsize=None)
+def get_crisis_detector() -> CrisisDetector:
+    """Process-wide detector - the NLTK/TextBlob analyzers are built once"""
+    return CrisisDetector()
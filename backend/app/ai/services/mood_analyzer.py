@@ -1,16 +1,18 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.models.user import MoodEntry
-from app.crypto.identity import AnonymousIdentity
+from app.crypto.identity import get_identity
 from datetime import datetime, timezone, timedelta  # ✅ Added timedelta
 import logging
+from functools import lru_cache
 
 
 class MoodAnalyzer:
     def __init__(self):
-        self.identity_manager = AnonymousIdentity()
+        self.identity_manager = get_identity()
         self.logger = logging.getLogger(__name__)
     
     def analyze_user_trends(self, user_commitment: str, db: Session, days: int = 30) -> Dict:
@@ -18,20 +20,18 @@ class MoodAnalyzer:
         try:
             # Get mood entries
             cutoff_date = datetime.utcnow() - timedelta(days=days)
-            entries = db.query(MoodEntry).filter(
-                MoodEntry.user_commitment == user_commitment,
-                MoodEntry.timestamp >= cutoff_date
-            ).order_by(MoodEntry.timestamp.asc()).all()
+            entries = db.execute(
+                select(MoodEntry.timestamp, MoodEntry.mood_score, MoodEntry.crisis_flag).where(
+                    MoodEntry.user_commitment == user_commitment,
+                    MoodEntry.timestamp >= cutoff_date
+                ).order_by(MoodEntry.timestamp.asc())
+            ).all()
             
             if len(entries) < 2:
                 return self._minimal_analysis()
             
-            # Convert to pandas for analysis
-            df = pd.DataFrame([{
-                'timestamp': entry.timestamp,
-                'mood_score': entry.mood_score,
-                'crisis_flag': entry.crisis_flag
-            } for entry in entries])
+            # Rows are plain tuples, so pandas can take them as-is
+            df = pd.DataFrame(entries, columns=['timestamp', 'mood_score', 'crisis_flag'])
             
             # Trend analysis
             trend_analysis = self._calculate_trend(df)
@@ -295,3 +295,9 @@ class MoodAnalyzer:
             insights.append("Low crisis indicators - community appears stable")
         
         return insights
+
+
+@lru_cache(maxsize=None)
+def get_mood_analyzer() -> MoodAnalyzer:
+    """Process-wide analyzer shared by the mood and reputation services"""
+    return MoodAnalyzer()
@@ -81,6 +81,11 @@ class PeerService:
             
             similar_users = query.limit(limit).all()
             
+            # Requested topics are the same for every candidate - tokenize once
+            criteria_topics = frozenset(
+                t for t in (s.strip().lower() for s in topics.split(',')) if t
+            ) if topics else frozenset()
+            
             matches = []
             for user in similar_users:
                 # Calculate basic compatibility score
@@ -88,10 +93,8 @@ class PeerService:
                 
                 # Find common topics
                 common_topics = []
-                if topics and user.topics:
-                    user_topics = set(t.strip().lower() for t in topics.split(','))
-                    similar_topics = set(t.strip().lower() for t in user.topics.split(','))
-                    common_topics = list(user_topics.intersection(similar_topics))
+                if criteria_topics and user.topics:
+                    common_topics = list(criteria_topics.intersection(t.strip().lower() for t in user.topics.split(',')))
                     score += len(common_topics) * 15
                 
                 # Severity level match
@@ -0,0 +1,36 @@
+# backend/app/ai/utils/stats.py
+import numpy as np
+
+# Numba is optional - without it the kernels below run as plain Python
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+@njit(cache=True)
+def match_scores(topic_masks: np.ndarray, severity_match: np.ndarray, age_match: np.ndarray):
+    """
+    Basic peer compatibility: 50 + 15 per shared topic (bits set in the
+    candidate's uint64 topic mask) + 25 same severity + 15 same age range,
+    capped at 100.
+    """
+    n = topic_masks.shape[0]
+    out = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        m = topic_masks[i]
+        shared = 0
+        while m:
+            m &= m - np.uint64(1)
+            shared += 1
+        score = 50 + 15 * shared
+        if severity_match[i]:
+            score += 25
+        if age_match[i]:
+            score += 15
+        out[i] = min(score, 100)
+    return out
+
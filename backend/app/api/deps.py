@@ -0,0 +1,75 @@
+# backend/app/api/deps.py
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session
+from app.database.connection import get_db
+from app.models.user import User
+from app.services.auth import AuthService, AuthPrincipal
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def get_auth_service() -> AuthService:
+    """Process-wide AuthService"""
+    return AuthService()
+
+# Shared across routers so FastAPI's per-request dependency cache
+# resolves the token once, however many dependencies need it
+auth_service = get_auth_service()
+
+def get_current_user_commitment(principal: AuthPrincipal = Depends(auth_service.verify_token)) -> str:
+    """Extract user commitment from token"""
+    return principal.commitment
+
+# Everything the routers read off the caller - served from ix_user_commitment_covering
+_CURRENT_USER_COLUMNS = (
+    User.id, User.commitment, User.topics, User.severity_level, User.age_range, User.is_active
+)
+
+def get_current_user(
+    request: Request,
+    db: Session = Depends(get_db),
+    user_commitment: str = Depends(get_current_user_commitment)
+) -> Row:
+    """Get the current user's row (not a full ORM object), looked up at most once per request"""
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+    
+    user = db.execute(
+        select(*_CURRENT_USER_COLUMNS).where(User.commitment == user_commitment)
+    ).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    request.state.user = user
+    return user
+
+def load_peer_service_class():
+    """Import PeerService once - None when AI matching is not installed"""
+    try:
+        from app.ai.services.peer_service import PeerService
+        return PeerService
+    except ImportError as e:
+        logger.warning(f"PeerService not available: {e}")
+        return None
+
+def get_peer_service_class(request: Request):
+    """PeerService class cached on app.state (loaded on startup, or on first use)"""
+    state = request.app.state
+    if not hasattr(state, "peer_service_cls"):
+        state.peer_service_cls = load_peer_service_class()
+    return state.peer_service_cls
+
+def get_peer_service(
+    db: Session = Depends(get_db),
+    peer_service_cls = Depends(get_peer_service_class)
+):
+    """PeerService bound to this request's database session"""
+    if peer_service_cls is None:
+        return None
+    return peer_service_cls(db)
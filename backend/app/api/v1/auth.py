@@ -2,23 +2,26 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
 from app.services.auth import AuthService
-from app.services.blockchain_service import BlockchainService
+from app.api.deps import get_current_user_commitment, get_auth_service
+from app.services.blockchain_service import get_blockchain_service
+from app.blockchain.register_commitment import commitment_batcher
 from app.models.user import User, MoodEntry, PeerSession, SessionMatch
 from pydantic import BaseModel
 import re
+import logging
 
 router = APIRouter()
-auth_service = AuthService()
+logger = logging.getLogger(__name__)
 
 # Initialize blockchain service
 try:
-    blockchain_service = BlockchainService()
+    blockchain_service = get_blockchain_service()
     blockchain_enabled = True
-    print("✅ Blockchain service enabled")
+    logger.info("✅ Blockchain service enabled")
 except Exception as e:
     blockchain_service = None
     blockchain_enabled = False
-    print(f"⚠️ Blockchain service disabled: {e}")
+    logger.warning(f"⚠️ Blockchain service disabled: {e}")
 
 class UserRegistration(BaseModel):
     age_range: str
@@ -26,20 +29,12 @@ class UserRegistration(BaseModel):
     severity_level: str
     preferred_times: list
 
-def get_current_user_commitment(token: str = Depends(auth_service.verify_token)) -> str:
-    """Extract user commitment from token"""
-    try:
-        if isinstance(token, dict):
-            return token.get("commitment")
-        return token
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication token"
-        )
-
 @router.post("/register")
-async def register_user(user_data: UserRegistration, db: Session = Depends(get_db)):
+async def register_user(
+    user_data: UserRegistration,
+    db: Session = Depends(get_db),
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """Register new anonymous user with blockchain integration"""
     try:
         # Create anonymous commitment
@@ -56,22 +51,20 @@ async def register_user(user_data: UserRegistration, db: Session = Depends(get_d
         )
         db.add(db_user)
         db.commit()
-        db.refresh(db_user)
         
         blockchain_result = None
         
         # Register on blockchain if enabled
         if blockchain_enabled and blockchain_service:
             try:
-                blockchain_result = blockchain_service.register_user_commitment(
-                    registration_result["commitment"]
-                )
+                # Registrations arriving together share one registerUsers transaction
+                blockchain_result = await commitment_batcher.register(registration_result["commitment"])
                 if blockchain_result:
-                    print(f"✅ User registered on blockchain: {blockchain_result['tx_hash']}")
+                    logger.info(f"✅ User registered on blockchain: {blockchain_result['tx_hash']}")
                 else:
-                    print("⚠️ Blockchain registration failed")
+                    logger.warning("⚠️ Blockchain registration failed")
             except Exception as blockchain_error:
-                print(f"⚠️ Blockchain registration error: {blockchain_error}")
+                logger.warning(f"⚠️ Blockchain registration error: {blockchain_error}")
         
         response = {
             "message": "User registered successfully",
@@ -98,7 +91,11 @@ async def register_user(user_data: UserRegistration, db: Session = Depends(get_d
         )
 
 @router.post("/login")
-async def login_user(login_data: dict, db: Session = Depends(get_db)):
+def login_user(
+    login_data: dict,
+    db: Session = Depends(get_db),
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """Login with commitment and randomness"""
     try:
         commitment = login_data.get("commitment")
@@ -134,7 +131,7 @@ async def login_user(login_data: dict, db: Session = Depends(get_db)):
         )
 
 @router.get("/user/{commitment}/reputation")
-async def get_user_reputation(commitment: str, db: Session = Depends(get_db)):
+def get_user_reputation(commitment: str, db: Session = Depends(get_db)):
     """Get user reputation - prioritize database over blockchain"""
     try:
         db_user = db.query(User).filter(User.commitment == commitment).first()
@@ -156,7 +153,7 @@ async def get_user_reputation(commitment: str, db: Session = Depends(get_db)):
 
 
 @router.get("/user/profile")
-async def get_user_profile(
+def get_user_profile(
     db: Session = Depends(get_db),
     current_user_commitment: str = Depends(get_current_user_commitment)
 ):
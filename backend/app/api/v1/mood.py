@@ -1,31 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, distinct, func, select
 from app.database.connection import get_db, SessionLocal  # ✅ Added SessionLocal for background tasks
-from app.services.auth import AuthService
-from app.services.mood import MoodService
+from app.api.deps import get_current_user_commitment
+from app.services.mood import get_mood_service
+from app.services.token_automation import get_token_service
+from app.core.cache import invalidate_reputation
 from app.models.user import User, MoodEntry
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone, timedelta
-import json
 import logging
 import asyncio
 from contextlib import contextmanager
 
-# ✅ FIXED: Improved logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # AI services - with fallback if not available
 try:
-    from app.ai.services.crisis_detector import CrisisDetector
-    from app.ai.services.mood_analyzer import MoodAnalyzer
-    crisis_detector = CrisisDetector()
-    mood_analyzer = MoodAnalyzer()
+    from app.ai.services.crisis_detector import get_crisis_detector
+    from app.ai.services.mood_analyzer import get_mood_analyzer
+    crisis_detector = get_crisis_detector()
+    mood_analyzer = get_mood_analyzer()
     AI_ENABLED = True
     logger.info("✅ AI components loaded for mood analysis")
 except ImportError as e:
@@ -35,11 +31,10 @@ except ImportError as e:
     mood_analyzer = None
 
 router = APIRouter()
-auth_service = AuthService()
 
 # Initialize mood service with fallback
 try:
-    mood_service = MoodService()
+    mood_service = get_mood_service()
     logger.info("✅ MoodService initialized successfully")
 except Exception as e:
     logger.error(f"⚠️ MoodService initialization failed: {e}")
@@ -68,21 +63,8 @@ def get_background_db():
         db.close()
 
 
-def get_current_user_commitment(token: str = Depends(auth_service.verify_token)) -> str:
-    """Extract user commitment from token"""
-    try:
-        if isinstance(token, dict):
-            return token.get("commitment")
-        return token
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication token"
-        )
-
-
 @router.post("/record")
-async def record_mood(
+def record_mood(
     mood_data: MoodRecord,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -97,54 +79,17 @@ async def record_mood(
                 detail="Mood score must be between 1 and 10"
             )
         
-        # Get user from database
-        user = db.query(User).filter(User.commitment == current_user_commitment).first()
-        if not user:
+        if not mood_service:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Mood service not available"
             )
         
-        # Create mood entry with fields that exist in your model
-        mood_entry = MoodEntry(
-            user_id=user.id,
-            user_commitment=current_user_commitment,
-            encrypted_data=json.dumps(mood_data.dict()),
-            mood_score=mood_data.score,
-            description=mood_data.description,
-            triggers=mood_data.triggers or "",
-            notes=mood_data.notes or "",
-            crisis_flag=False,  # Will be updated after AI analysis
-            timestamp=datetime.now(timezone.utc)
+        # Insert, crisis detection and the deferred token reward live in MoodService
+        response = mood_service.record_mood(
+            current_user_commitment, mood_data.dict(), db, background_tasks
         )
-        
-        # Initialize default crisis analysis
-        crisis_analysis = {
-            'risk_level': 'MINIMAL',
-            'needs_intervention': False,
-            'recommendations': ['Continue monitoring your mood'],
-            'sentiment': {},
-            'keywords': {}
-        }
-        
-        # Perform AI crisis detection if available
-        if AI_ENABLED and crisis_detector:
-            try:
-                full_text = f"{mood_data.description} {mood_data.triggers or ''} {mood_data.notes or ''}".strip()
-                crisis_analysis = crisis_detector.analyze_text(full_text)
-                
-                # Update crisis_flag based on AI analysis
-                mood_entry.crisis_flag = crisis_analysis.get('needs_intervention', False)
-                
-                logger.info(f"AI Analysis complete - Risk: {crisis_analysis.get('risk_level')}")
-                
-            except Exception as ai_error:
-                logger.error(f"⚠️ AI analysis error: {ai_error}", exc_info=True)
-        
-        # Save to database
-        db.add(mood_entry)
-        db.commit()
-        db.refresh(mood_entry)
+        crisis_analysis = response["crisis_analysis"]
         
         # ✅ FIXED: Schedule background crisis intervention with proper session handling
         if crisis_analysis.get('needs_intervention', False):
@@ -152,7 +97,7 @@ async def record_mood(
                 handle_crisis_intervention,
                 current_user_commitment,
                 crisis_analysis,
-                mood_entry.id
+                response["mood_entry_id"]
             )
         
         # ✅ FIXED: Schedule reputation update in background
@@ -161,35 +106,12 @@ async def record_mood(
             current_user_commitment
         )
         
-        response = {
-            "message": "Mood recorded successfully",
-            "mood_entry_id": mood_entry.id,
-            "crisis_analysis": {
-                "risk_level": crisis_analysis.get('risk_level', 'MINIMAL'),
-                "needs_intervention": crisis_analysis.get('needs_intervention', False),
-                "recommendations": crisis_analysis.get('recommendations', [])[:3]
-            }
-        }
-        
-        # Add urgent warnings for high-risk situations
-        if crisis_analysis.get('risk_level') == 'HIGH':
-            response["crisis_resources"] = [
-                "🇮🇳 AASRA: 91-9820466726 (24/7 suicide prevention helpline)",
-                "🇮🇳 iCall: 9152987821 (Psychosocial support - TISS Mumbai)", 
-                "🇮🇳 Vandrevala Foundation: 9999666555 (24/7 mental health helpline)",
-                "🇮🇳 Sumaitri: 011-23389090 (Delhi-based crisis helpline)",
-                "🇮🇳 Sneha Foundation: 044-24640050 (Chennai crisis helpline)",
-                "🇮🇳 Sahai: 080-25497777 (Bangalore emotional support)",
-                "🇮🇳 Roshni Trust: 040-66202000 (Hyderabad crisis helpline)",
-                "🇮🇳 Lifeline Foundation: 033-24637401 (Kolkata suicide prevention)"
-            ]
-        
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error recording mood: {e}", exc_info=True)
+        logger.exception("Error recording mood")
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -198,7 +120,7 @@ async def record_mood(
 
 
 @router.get("/analysis")
-async def get_mood_analysis(
+def get_mood_analysis(
     days: int = 30,
     db: Session = Depends(get_db),
     current_user_commitment: str = Depends(get_current_user_commitment)
@@ -222,12 +144,31 @@ async def get_mood_analysis(
         
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
         
-        mood_entries = db.query(MoodEntry).filter(
+        # One aggregate row from the database: row_number() ranks entries
+        # newest first so the oldest/newest thirds can be averaged in SQL
+        ranked = select(
+            MoodEntry.mood_score,
+            MoodEntry.crisis_flag,
+            func.row_number().over(order_by=MoodEntry.timestamp.desc()).label("rn"),
+            func.count().over().label("n")
+        ).where(
             MoodEntry.user_id == user.id,
             MoodEntry.timestamp >= cutoff_date
-        ).order_by(MoodEntry.timestamp.desc()).all()
+        ).subquery()
+        
+        # Oldest third is rounded up, newest third rounded down
+        entries_count, avg_mood, high_risk_count, unique_scores, first_avg, last_avg = db.execute(
+            select(
+                func.count(),
+                func.avg(ranked.c.mood_score),
+                func.coalesce(func.sum(case((ranked.c.crisis_flag, 1), else_=0)), 0),
+                func.count(distinct(ranked.c.mood_score)),
+                func.avg(case((ranked.c.rn > ranked.c.n - (ranked.c.n + 2) // 3, ranked.c.mood_score))),
+                func.avg(case((ranked.c.rn <= ranked.c.n // 3, ranked.c.mood_score)))
+            )
+        ).one()
         
-        if not mood_entries:
+        if not entries_count:
             return {
                 "user_analysis": {
                     "period_days": days,
@@ -240,23 +181,13 @@ async def get_mood_analysis(
                 "privacy_note": "Analysis performed on encrypted data - your privacy is protected"
             }
         
-        # Basic analysis
-        scores = [entry.mood_score for entry in mood_entries]
-        avg_mood = sum(scores) / len(scores)
-        
         # Risk assessment
-        high_risk_count = len([e for e in mood_entries if e.crisis_flag])
         risk_level = "HIGH" if high_risk_count > 0 else "LOW" if avg_mood > 6 else "MEDIUM"
         
         # Trend calculation (improved)
         trend_direction = "stable"
-        if len(scores) >= 3:
+        if entries_count >= 3:
             # Use first third vs last third for more stable trend
-            first_third = scores[-len(scores)//3:]
-            last_third = scores[:len(scores)//3]
-            first_avg = sum(first_third) / len(first_third)
-            last_avg = sum(last_third) / len(last_third)
-            
             if first_avg > last_avg + 0.5:
                 trend_direction = "improving"
             elif first_avg < last_avg - 0.5:
@@ -264,14 +195,14 @@ async def get_mood_analysis(
         
         analysis = {
             "period_days": days,
-            "entries_count": len(mood_entries),
+            "entries_count": entries_count,
             "trend": {
                 "direction": trend_direction,
-                "average_mood": round(avg_mood, 2)
+                "average_mood": round(float(avg_mood), 2)
             },
             "patterns": {
                 "volatility": {
-                    "level": "low" if len(set(scores)) <= 2 else "medium" if len(set(scores)) <= 5 else "high"
+                    "level": "low" if unique_scores <= 2 else "medium" if unique_scores <= 5 else "high"
                 }
             },
             "risk": {
@@ -312,11 +243,11 @@ async def get_mood_analysis(
 
 
 @router.get("/community-insights")
-async def get_community_insights(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_community_insights(db: Session = Depends(get_db)) -> Dict[str, Any]:
     """Get anonymized community mood insights"""
     try:
-        total_users = db.query(User).filter(User.is_active == True).count()
-        total_entries = db.query(MoodEntry).count()
+        total_users = db.scalar(select(func.count()).select_from(User).where(User.is_active == True))
+        total_entries = db.scalar(select(func.count()).select_from(MoodEntry))
         
         if total_entries == 0:
             return {
@@ -331,7 +262,9 @@ async def get_community_insights(db: Session = Depends(get_db)) -> Dict[str, Any
         
         # Calculate community statistics
         avg_community_mood = db.query(func.avg(MoodEntry.mood_score)).scalar()
-        crisis_entries_count = db.query(MoodEntry).filter(MoodEntry.crisis_flag == True).count()
+        crisis_entries_count = db.scalar(
+            select(func.count()).select_from(MoodEntry).where(MoodEntry.crisis_flag == True)
+        )
         
         insights = {
             "total_active_users": total_users,
@@ -414,59 +347,68 @@ async def handle_crisis_intervention(user_commitment: str, crisis_analysis: Dict
 
 
 # ✅ NEW: Background task for reputation updates
+def _recalculate_reputation(user_commitment: str) -> Dict:
+    with get_background_db() as db:
+        return get_token_service().update_user_reputation(user_commitment, db)
+
+
 async def update_user_reputation_after_mood_entry(user_commitment: str):
     """Background task to update user reputation after mood entry"""
     try:
-        # Import here to avoid circular imports
-        from app.services.token_automation import AdvancedReputationService
-        
-        with get_background_db() as db:
-            reputation_service = AdvancedReputationService()
-            result = reputation_service.calculate_comprehensive_reputation(user_commitment, db)
+        # The recalculation queries and commits - keep it off the event loop
+        result = await asyncio.to_thread(_recalculate_reputation, user_commitment)
+        
+        if result and not result.get('error'):
+            await invalidate_reputation(user_commitment)
+            logger.info(f"✅ Reputation updated for user {user_commitment[:8]}...")
+        else:
+            logger.warning(f"⚠️ Reputation update failed for user {user_commitment[:8]}...")
             
-            if result and not result.get('error'):
-                logger.info(f"✅ Reputation updated for user {user_commitment[:8]}...")
-            else:
-                logger.warning(f"⚠️ Reputation update failed for user {user_commitment[:8]}...")
-                
     except Exception as e:
         logger.error(f"❌ Error updating reputation: {e}", exc_info=True)
 
 
+# Static portion of the health payload - only the timestamp changes per call
+_HEALTH_BASE: Dict[str, Any] = {
+    "service": "mood_tracking",
+    "status": "operational",
+    "ai_components": "enabled" if AI_ENABLED else "disabled",
+    "mood_service": "enabled" if mood_service else "disabled",
+    "datetime_import": "fixed",
+    "features": [
+        "mood_recording",
+        "crisis_detection" if AI_ENABLED else "basic_crisis_detection",
+        "trend_analysis",
+        "community_insights",
+        "background_crisis_intervention",
+        "reputation_updates"
+    ],
+    "version": "2.0.0"
+}
+
+
 @router.get("/health")
 async def mood_service_health() -> Dict[str, Any]:
     """Health check for mood tracking service"""
-    return {
-        "service": "mood_tracking",
-        "status": "operational",
-        "ai_components": "enabled" if AI_ENABLED else "disabled",
-        "mood_service": "enabled" if mood_service else "disabled",
-        "datetime_import": "fixed",
-        "features": [
-            "mood_recording",
-            "crisis_detection" if AI_ENABLED else "basic_crisis_detection",
-            "trend_analysis",
-            "community_insights",
-            "background_crisis_intervention",
-            "reputation_updates"
-        ],
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "version": "2.0.0"
-    }
+    return {**_HEALTH_BASE, "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
 # ✅ NEW: Additional utility endpoints
 @router.get("/stats")
-async def get_mood_service_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_mood_service_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
     """Get mood service statistics"""
     try:
-        total_entries = db.query(MoodEntry).count()
-        total_users = db.query(User).filter(User.is_active == True).count()
-        crisis_entries = db.query(MoodEntry).filter(MoodEntry.crisis_flag == True).count()
+        total_entries = db.scalar(select(func.count()).select_from(MoodEntry))
+        total_users = db.scalar(select(func.count()).select_from(User).where(User.is_active == True))
+        crisis_entries = db.scalar(
+            select(func.count()).select_from(MoodEntry).where(MoodEntry.crisis_flag == True)
+        )
         
         # Get entries from last 24 hours
         yesterday = datetime.now(timezone.utc) - timedelta(hours=24)
-        recent_entries = db.query(MoodEntry).filter(MoodEntry.timestamp >= yesterday).count()
+        recent_entries = db.scalar(
+            select(func.count()).select_from(MoodEntry).where(MoodEntry.timestamp >= yesterday)
+        )
         
         return {
             "total_mood_entries": total_entries,
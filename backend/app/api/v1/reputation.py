@@ -1,35 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.orm import Session
+from sqlalchemy import func, select
 from app.database.connection import get_db
-from app.services.auth import AuthService
+from app.api.deps import get_current_user_commitment
 from app.models.user import User
+from app.core.cache import (
+    REPUTATION_CACHE_TTL, cache_get, cache_set, invalidate_reputation, reputation_cache_key
+)
 from typing import Dict
+from bisect import bisect_right
 from datetime import datetime, timezone
+import asyncio
+import logging
 
 router = APIRouter()
-auth_service = AuthService()
+logger = logging.getLogger(__name__)
 
 # Import the reputation service we created earlier
 try:
-    from app.services.token_automation import TokenAutomationService
-    reputation_service = TokenAutomationService()
+    from app.services.token_automation import get_token_service
+    reputation_service = get_token_service()
     REPUTATION_ENABLED = True
 except ImportError:
-    print("⚠️ TokenAutomationService not available")
+    logger.warning("⚠️ TokenAutomationService not available")
     REPUTATION_ENABLED = False
     reputation_service = None
 
-def get_current_user_commitment(token: str = Depends(auth_service.verify_token)) -> str:
-    """Extract user commitment from token"""
-    try:
-        if isinstance(token, dict):
-            return token.get("commitment")
-        return token
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication token"
-        )
+def _get_user(db: Session, commitment: str):
+    """Blocking user lookup - the async handlers run it via asyncio.to_thread"""
+    return db.query(User).filter(User.commitment == commitment).first()
 
 @router.get("/score")
 async def get_reputation_score(
@@ -38,20 +37,27 @@ async def get_reputation_score(
 ):
     """Get current user's reputation score and breakdown"""
     try:
-        user = db.query(User).filter(User.commitment == current_user_commitment).first()
+        cache_key = reputation_cache_key("score", current_user_commitment)
+        cached = await cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        user = await asyncio.to_thread(_get_user, db, current_user_commitment)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        return {
+        result = {
             "user_commitment": current_user_commitment,
             "current_reputation": user.reputation_score,
             "last_updated": user.updated_at.isoformat() if user.updated_at else None,
             "reputation_level": _get_reputation_level(user.reputation_score),
             "next_milestone": _get_next_milestone(user.reputation_score)
         }
+        await cache_set(cache_key, result, REPUTATION_CACHE_TTL)
+        return result
         
     except HTTPException:
         raise
@@ -76,7 +82,9 @@ async def update_reputation_score(
             )
         
         # Calculate new reputation
-        reputation_result = reputation_service.update_user_reputation(current_user_commitment, db)
+        reputation_result = await asyncio.to_thread(
+            reputation_service.update_user_reputation, current_user_commitment, db
+        )
         
         if reputation_result.get('error'):
             raise HTTPException(
@@ -84,6 +92,8 @@ async def update_reputation_score(
                 detail=reputation_result['error']
             )
         
+        await invalidate_reputation(current_user_commitment)
+        
         return {
             "message": "Reputation updated successfully",
             "reputation_data": reputation_result
@@ -104,7 +114,12 @@ async def get_reputation_breakdown(
 ):
     """Get detailed breakdown of reputation factors"""
     try:
-        user = db.query(User).filter(User.commitment == current_user_commitment).first()
+        cache_key = reputation_cache_key("breakdown", current_user_commitment)
+        cached = await cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        user = await asyncio.to_thread(_get_user, db, current_user_commitment)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -130,7 +145,9 @@ async def get_reputation_breakdown(
             ]
         }
         
-        return {"reputation_breakdown": breakdown}
+        result = {"reputation_breakdown": breakdown}
+        await cache_set(cache_key, result, REPUTATION_CACHE_TTL)
+        return result
         
     except HTTPException:
         raise
@@ -141,30 +158,36 @@ async def get_reputation_breakdown(
         )
 
 @router.get("/leaderboard")
-async def get_reputation_leaderboard(
+def get_reputation_leaderboard(
     limit: int = 10,
     db: Session = Depends(get_db)
 ):
     """Get anonymized reputation leaderboard"""
     try:
-        top_users = db.query(User).filter(
-            User.is_active == True,
-            User.reputation_score > 0
-        ).order_by(User.reputation_score.desc()).limit(limit).all()
+        # Only the columns the leaderboard renders - no full ORM hydration
+        top_users = db.execute(
+            select(User.commitment, User.reputation_score, User.created_at)
+            .where(User.is_active == True, User.reputation_score > 0)
+            .order_by(User.reputation_score.desc())
+            .limit(limit)
+        ).all()
         
-        leaderboard = []
-        for i, user in enumerate(top_users, 1):
-            leaderboard.append({
+        leaderboard = [
+            {
                 "rank": i,
-                "anonymous_id": user.commitment[:8] + "...",
-                "reputation_score": user.reputation_score,
-                "reputation_level": _get_reputation_level(user.reputation_score),
-                "joined": user.created_at.strftime("%Y-%m") if user.created_at else "Unknown"
-            })
+                "anonymous_id": f"{commitment[:8]}...",
+                "reputation_score": score,
+                "reputation_level": _LEVELS[bisect_right(_THRESHOLDS, score)],
+                "joined": created_at.strftime("%Y-%m") if created_at else "Unknown"
+            }
+            for i, (commitment, score, created_at) in enumerate(top_users, 1)
+        ]
         
         return {
             "leaderboard": leaderboard,
-            "total_active_users": db.query(User).filter(User.is_active == True).count(),
+            "total_active_users": db.scalar(
+                select(func.count()).select_from(User).where(User.is_active == True)
+            ),
             "generated_at": datetime.now(timezone.utc).isoformat()
         }
         
@@ -174,20 +197,13 @@ async def get_reputation_leaderboard(
             detail=f"Failed to get leaderboard: {str(e)}"
         )
 
+# Level boundaries (inclusive lower bounds) and the level each band maps to
+_THRESHOLDS = (20, 40, 60, 75, 90)
+_LEVELS = ("Observer", "Newcomer", "Member", "Supporter", "Mentor", "Guardian")
+
 def _get_reputation_level(score: float) -> str:
     """Convert reputation score to level"""
-    if score >= 90:
-        return "Guardian"
-    elif score >= 75:
-        return "Mentor"
-    elif score >= 60:
-        return "Supporter"
-    elif score >= 40:
-        return "Member"
-    elif score >= 20:
-        return "Newcomer"
-    else:
-        return "Observer"
+    return _LEVELS[bisect_right(_THRESHOLDS, score)]
 
 def _get_next_milestone(score: float) -> Dict:
     """Get next reputation milestone"""
@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy import select, update, case
 from app.database.connection import get_db
-from app.services.auth import AuthService
+from app.api.deps import get_current_user, get_peer_service
 from app.models.user import User, PeerSession
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from datetime import datetime
 import hashlib
 import logging
+import time
 
 router = APIRouter()
-auth_service = AuthService()
 logger = logging.getLogger(__name__)
 
 # =================== PYDANTIC MODELS ===================
@@ -21,46 +22,32 @@ class SessionCreateRequest(BaseModel):
     session_type: str = "group"  # group, individual, workshop
     preferences: Optional[Dict[str, Any]] = {}
 
-# =================== DEPENDENCY INJECTION ===================
+# =================== HELPERS ===================
 
-def get_current_user_commitment(token: str = Depends(auth_service.verify_token)) -> str:
-    """Extract user commitment from token"""
-    try:
-        if isinstance(token, dict):
-            return token.get("commitment")
-        return token
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication token"
-        )
-
-def get_peer_service(db: Session = Depends(get_db)):
-    """Lazy load PeerService to avoid circular import issues"""
-    try:
-        from app.ai.services.peer_service import PeerService
-        return PeerService(db)
-    except ImportError as e:
-        logger.warning(f"PeerService not available: {e}")
-        return None
+def _session_hash(commitment: str, topic: str) -> str:
+    """Unique 64-char session id from creator, topic and creation time"""
+    h = hashlib.blake2b(digest_size=32)
+    h.update(commitment.encode())
+    h.update(b"\x00")
+    h.update(topic.encode())
+    h.update(time.time_ns().to_bytes(8, "little"))
+    return h.hexdigest()
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    user_commitment: str = Depends(get_current_user_commitment)
-) -> User:
-    """Get current user from database"""
-    user = db.query(User).filter(User.commitment == user_commitment).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    return user
+# Columns the list endpoints render - fetched as plain rows, not ORM objects
+_SESSION_LIST_COLUMNS = (
+    PeerSession.id,
+    PeerSession.topic,
+    PeerSession.session_type,
+    PeerSession.max_participants,
+    PeerSession.participant_count,
+    PeerSession.status,
+    PeerSession.created_at,
+)
 
 # =================== SESSION ENDPOINTS ===================
 
 @router.post("/create")
-async def create_session(
+def create_session(
     session_data: SessionCreateRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -69,9 +56,7 @@ async def create_session(
     """Create a new peer support session"""
     try:
         # Generate unique session hash
-        session_hash = hashlib.sha256(
-            f"{current_user.commitment}_{session_data.topic}_{datetime.utcnow().isoformat()}".encode()
-        ).hexdigest()
+        session_hash = _session_hash(current_user.commitment, session_data.topic)
         
         # Create new session
         new_session = PeerSession(
@@ -87,8 +72,19 @@ async def create_session(
         )
         
         db.add(new_session)
+        db.flush()
+        # Read back before commit expires the instance - no refresh SELECT needed
+        session_info = {
+            "session_id": new_session.id,
+            "session_hash": new_session.session_hash,
+            "topic": new_session.topic,
+            "session_type": new_session.session_type,
+            "max_participants": new_session.max_participants,
+            "current_participants": new_session.participant_count,
+            "status": new_session.status,
+            "created_at": new_session.created_at,
+        }
         db.commit()
-        db.refresh(new_session)
         
         # Update user profile for better matching if PeerService is available
         if peer_service and session_data.preferences:
@@ -102,14 +98,7 @@ async def create_session(
                 logger.warning(f"Failed to update user profile: {e}")
         
         return {
-            "session_id": new_session.id,
-            "session_hash": new_session.session_hash,
-            "topic": new_session.topic,
-            "session_type": new_session.session_type,
-            "max_participants": new_session.max_participants,
-            "current_participants": new_session.participant_count,
-            "status": new_session.status,
-            "created_at": new_session.created_at.isoformat(),
+            **session_info,
             "matching_enabled": peer_service is not None
         }
         
@@ -124,15 +113,17 @@ async def create_session(
         )
 
 @router.get("/my-sessions")
-async def get_my_sessions(
+def get_my_sessions(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get sessions created by the current user"""
     try:
-        sessions = db.query(PeerSession).filter(
-            PeerSession.creator_commitment == current_user.commitment
-        ).order_by(PeerSession.created_at.desc()).all()
+        sessions = db.execute(
+            select(*_SESSION_LIST_COLUMNS).where(
+                PeerSession.creator_commitment == current_user.commitment
+            ).order_by(PeerSession.created_at.desc())
+        ).all()
         
         sessions_data = []
         for session in sessions:
@@ -143,7 +134,7 @@ async def get_my_sessions(
                 "max_participants": session.max_participants,
                 "current_participants": session.participant_count,
                 "status": session.status,
-                "created_at": session.created_at.isoformat(),
+                "created_at": session.created_at,
                 "host_id": current_user.commitment,
                 "is_host": True
             })
@@ -161,7 +152,7 @@ async def get_my_sessions(
         )
 
 @router.get("/available")
-async def get_available_sessions(
+def get_available_sessions(
     topic: Optional[str] = None,
     limit: int = 20,
     db: Session = Depends(get_db),
@@ -169,16 +160,16 @@ async def get_available_sessions(
 ):
     """Get available sessions (excluding user's own sessions)"""
     try:
-        query = db.query(PeerSession).filter(
+        query = select(*_SESSION_LIST_COLUMNS, PeerSession.spots_available).where(
             PeerSession.status.in_(["active", "scheduled"]),
             PeerSession.creator_commitment != current_user.commitment,
-            PeerSession.participant_count < PeerSession.max_participants
+            PeerSession.spots_available > 0
         )
         
         if topic:
-            query = query.filter(PeerSession.topic.ilike(f"%{topic}%"))
+            query = query.where(PeerSession.topic.ilike(f"%{topic}%"))
         
-        sessions = query.order_by(PeerSession.created_at.desc()).limit(limit).all()
+        sessions = db.execute(query.order_by(PeerSession.created_at.desc()).limit(limit)).all()
         
         sessions_data = []
         for session in sessions:
@@ -189,8 +180,8 @@ async def get_available_sessions(
                 "max_participants": session.max_participants,
                 "current_participants": session.participant_count,
                 "status": session.status,
-                "created_at": session.created_at.isoformat(),
-                "spots_available": session.max_participants - session.participant_count
+                "created_at": session.created_at,
+                "spots_available": session.spots_available
             })
         
         return {
@@ -207,48 +198,67 @@ async def get_available_sessions(
         )
 
 @router.post("/{session_id}/join")
-async def join_session(
+def join_session(
     session_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Join an existing peer session"""
     try:
-        session = db.query(PeerSession).filter(PeerSession.id == session_id).first()
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
+        # Check-and-increment in a single UPDATE so concurrent joiners
+        # can never push a session past max_participants
+        joined = db.execute(
+            update(PeerSession)
+            .where(
+                PeerSession.id == session_id,
+                PeerSession.participant_count < PeerSession.max_participants,
+                PeerSession.creator_commitment != current_user.commitment
             )
-        
-        # Validation checks
-        if session.participant_count >= session.max_participants:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Session is full"
+            .values(
+                participant_count=PeerSession.participant_count + 1,
+                status=case(
+                    (PeerSession.participant_count + 1 >= PeerSession.max_participants, "full"),
+                    (PeerSession.status == "scheduled", "active"),
+                    else_=PeerSession.status
+                )
+            )
+            .returning(
+                PeerSession.id,
+                PeerSession.topic,
+                PeerSession.participant_count,
+                PeerSession.status
             )
+            .execution_options(synchronize_session=False)
+        ).first()
         
-        if session.creator_commitment == current_user.commitment:
+        if joined is None:
+            # Nothing was updated - look the session up only to explain why
+            session = db.query(PeerSession).filter(PeerSession.id == session_id).first()
+            if not session:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Session not found"
+                )
+            
+            if session.participant_count >= session.max_participants:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Session is full"
+                )
+            
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot join your own session"
             )
         
-        # Update session
-        session.participant_count += 1
-        if session.participant_count >= session.max_participants:
-            session.status = "full"
-        elif session.status == "scheduled":
-            session.status = "active"
-        
         db.commit()
         
         return {
             "message": "Successfully joined session",
-            "session_id": session.id,
-            "topic": session.topic,
-            "participant_count": session.participant_count,
-            "status": session.status
+            "session_id": joined.id,
+            "topic": joined.topic,
+            "participant_count": joined.participant_count,
+            "status": joined.status
         }
         
     except HTTPException:
@@ -262,7 +272,7 @@ async def join_session(
         )
 
 @router.delete("/{session_id}/cancel")
-async def cancel_session(
+def cancel_session(
     session_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
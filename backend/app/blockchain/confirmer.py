@@ -0,0 +1,101 @@
+# backend/app/blockchain/confirmer.py
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+from web3.exceptions import TransactionNotFound
+from app.blockchain.web3client import web3
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptConfirmer:
+    """
+    Confirms fire-and-forget transactions off the request path. One daemon
+    thread fetches every pending receipt, as a single JSON-RPC batch, once
+    per TX_POLL_LATENCY seconds.
+    """
+
+    def __init__(self, poll_latency: float, timeout: int):
+        self.poll_latency = poll_latency
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, tx_hash, label: str = "") -> None:
+        """Track a sent transaction until it is mined or times out"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="receipt-confirmer", daemon=True)
+                self._thread.start()
+        self._queue.put((tx_hash, label, time.monotonic() + self.timeout))
+
+    def _drain(self, pending: list, block: bool) -> None:
+        try:
+            pending.append(self._queue.get(block=block))
+            while True:
+                pending.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _run(self):
+        pending = []
+        while True:
+            # Sleep on the queue when idle, otherwise just pick up new arrivals
+            self._drain(pending, block=not pending)
+            time.sleep(self.poll_latency)
+
+            still_pending = []
+            receipts = self._receipts([tx_hash for tx_hash, _, _ in pending])
+            for (tx_hash, label, deadline), receipt in zip(pending, receipts):
+                if receipt is not None:
+                    if receipt['status'] == 1:
+                        logger.info("✅ Transaction confirmed: %s %s (block %s)", web3.to_hex(tx_hash), label, receipt['blockNumber'])
+                    else:
+                        logger.error("❌ Transaction reverted: %s %s", web3.to_hex(tx_hash), label)
+                elif time.monotonic() > deadline:
+                    logger.warning("⚠️ No receipt after %ss: %s %s", self.timeout, web3.to_hex(tx_hash), label)
+                else:
+                    still_pending.append((tx_hash, label, deadline))
+            pending = still_pending
+
+    def _receipts(self, tx_hashes: list) -> List[Optional[dict]]:
+        """Receipts for all pending hashes in one JSON-RPC batch (None = not mined yet)"""
+        if len(tx_hashes) == 1:
+            return [self._receipt(tx_hashes[0])]
+        try:
+            # Raw provider batch: web3's batch_requests fails the whole batch on one
+            # not-yet-mined hash, here it is just a null result
+            responses = web3.provider.make_batch_request([
+                ("eth_getTransactionReceipt", [web3.to_hex(tx_hash)]) for tx_hash in tx_hashes
+            ])
+            if not isinstance(responses, list):
+                raise ValueError(responses.get("error", responses))
+            return [self._format_receipt(r.get("result")) for r in responses]
+        except Exception as e:
+            # Some nodes reject JSON-RPC batches
+            logger.warning("⚠️ Batched receipt lookup failed, polling individually: %s", e)
+            return [self._receipt(tx_hash) for tx_hash in tx_hashes]
+
+    @staticmethod
+    def _format_receipt(raw: Optional[dict]) -> Optional[dict]:
+        """The receipt fields the confirmer reads, decoded from a raw RPC result"""
+        if not raw:
+            return None
+        return {'status': int(raw['status'], 16), 'blockNumber': int(raw['blockNumber'], 16)}
+
+    @staticmethod
+    def _receipt(tx_hash) -> Optional[dict]:
+        try:
+            return web3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+        except Exception as e:
+            logger.warning("⚠️ Receipt lookup failed for %s: %s", web3.to_hex(tx_hash), e)
+            return None
+
+
+receipt_confirmer = ReceiptConfirmer(settings.TX_POLL_LATENCY, settings.TX_RECEIPT_TIMEOUT)
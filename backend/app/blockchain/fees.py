@@ -0,0 +1,29 @@
+# backend/app/blockchain/fees.py
+import time
+from functools import lru_cache
+from typing import Dict
+from app.blockchain.web3client import web3
+
+# Fee snapshot is refreshed about once per block
+FEE_CACHE_TTL = 12
+MIN_PRIORITY_FEE = web3.to_wei(1, 'gwei')
+LEGACY_GAS_PRICE = web3.to_wei(20, 'gwei')
+
+
+@lru_cache(maxsize=1)
+def _fee_snapshot(ttl_bucket: int) -> Dict[str, int]:
+    history = web3.eth.fee_history(4, 'latest', [50])
+    base_fees = history.get('baseFeePerGas') or []
+    if not base_fees or not base_fees[-1]:
+        # Pre-London chain - no base fee, keep legacy pricing
+        return {'gasPrice': LEGACY_GAS_PRICE}
+
+    tips = sorted(reward[0] for reward in history.get('reward') or [] if reward)
+    tip = max(tips[len(tips) // 2] if tips else 0, MIN_PRIORITY_FEE)
+    # base_fees[-1] is the next block's base fee; 2x absorbs a few full blocks
+    return {'maxFeePerGas': base_fees[-1] * 2 + tip, 'maxPriorityFeePerGas': tip}
+
+
+def fee_params() -> Dict[str, int]:
+    """EIP-1559 fee fields for build_transaction (gasPrice on legacy chains)"""
+    return _fee_snapshot(int(time.monotonic() // FEE_CACHE_TTL))
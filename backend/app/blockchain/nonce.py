@@ -0,0 +1,36 @@
+# backend/app/blockchain/nonce.py
+import threading
+from functools import lru_cache
+from app.blockchain.web3client import web3
+
+
+class NonceManager:
+    """
+    Hands out sequential nonces for one signer without asking the node each
+    time. The pending nonce is fetched on first use and after reset().
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._lock = threading.Lock()
+        self._next = None
+
+    def acquire(self) -> int:
+        """Reserve the next nonce"""
+        with self._lock:
+            if self._next is None:
+                self._next = web3.eth.get_transaction_count(self.address, "pending")
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def reset(self) -> None:
+        """Re-sync with the node on the next acquire (call after a failed send)"""
+        with self._lock:
+            self._next = None
+
+
+@lru_cache(maxsize=None)
+def get_nonce_manager(address: str) -> NonceManager:
+    """One manager per signer address, shared by every sender in the process"""
+    return NonceManager(address)
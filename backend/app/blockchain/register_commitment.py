@@ -1,18 +1,160 @@
 from web3 import Web3
 from app.blockchain.web3client import user_registry, web3
-import os
-
-def register_commitment_on_chain(commitment_hex: str):
-    private_key = os.environ["PRIVATE_KEY"]
-    account = web3.eth.account.from_key(private_key)
-
-    txn = user_registry.functions.registerUser(Web3.to_bytes(hexstr=commitment_hex)).build_transaction({
-        'from': account.address,
-        'nonce': web3.eth.get_transaction_count(account.address),
-        'gas': 200000,
-        'gasPrice': web3.to_wei('20', 'gwei')
-    })
-
-    signed_tx = account.sign_transaction(txn)
-    tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-    return web3.to_hex(tx_hash)
+from app.core.config import settings
+from app.blockchain.nonce import get_nonce_manager
+from app.blockchain.fees import fee_params
+from app.services.blockchain_service import _users_call
+import asyncio
+import threading
+from typing import Dict, List
+
+# Signer is resolved once; nonces come from the process-wide NonceManager
+# (shared with BlockchainService, which signs with the same key)
+_account_lock = threading.Lock()
+_account = None
+
+def _signer():
+    """Signer account derived from PRIVATE_KEY (once)"""
+    global _account
+    with _account_lock:
+        if _account is None:
+            if not settings.PRIVATE_KEY:
+                raise RuntimeError("PRIVATE_KEY is not configured")
+            _account = web3.eth.account.from_key(settings.PRIVATE_KEY)
+        return _account
+
+def _next_nonce():
+    """Return the signer account and reserve its next nonce"""
+    account = _signer()
+    return account, get_nonce_manager(account.address).acquire()
+
+def _reset_nonce():
+    """Force a re-sync with the node on the next call"""
+    get_nonce_manager(_signer().address).reset()
+
+def _wait_for_registration(tx_hash) -> Dict:
+    """Block until the registration is mined; same shape as BlockchainService.register_user_commitment"""
+    # users() reads are cached - don't serve a stale "not registered"
+    _users_call.cache_clear()
+    receipt = web3.eth.wait_for_transaction_receipt(
+        tx_hash,
+        timeout=settings.TX_RECEIPT_TIMEOUT,
+        poll_latency=settings.TX_POLL_LATENCY
+    )
+    return {
+        'tx_hash': web3.to_hex(tx_hash),
+        'block_number': receipt['blockNumber'],
+        'gas_used': receipt['gasUsed'],
+        'status': receipt['status']
+    }
+
+def register_commitment_on_chain(commitment_hex: str) -> Dict:
+    """Register one commitment with registerUser and wait for its receipt"""
+    account, nonce = _next_nonce()
+
+    try:
+        txn = user_registry.functions.registerUser(Web3.to_bytes(hexstr=commitment_hex)).build_transaction({
+            'from': account.address,
+            'nonce': nonce,
+            'gas': 200000,
+            **fee_params()
+        })
+
+        signed_tx = account.sign_transaction(txn)
+        tx_hash = web3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    except Exception:
+        _reset_nonce()
+        raise
+    return _wait_for_registration(tx_hash)
+
+def register_commitments_on_chain(commitment_hexes: List[str]) -> Dict:
+    """Register several commitments in one registerUsers transaction and wait for it"""
+    account, nonce = _next_nonce()
+
+    try:
+        txn = user_registry.functions.registerUsers(
+            [Web3.to_bytes(hexstr=c) for c in commitment_hexes]
+        ).build_transaction({
+            'from': account.address,
+            'nonce': nonce,
+            'gas': 200000 * len(commitment_hexes),
+            **fee_params()
+        })
+
+        signed_tx = account.sign_transaction(txn)
+        tx_hash = web3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    except Exception:
+        _reset_nonce()
+        raise
+    return _wait_for_registration(tx_hash)
+
+def _supports_batch_registration() -> bool:
+    """True when the deployed UserRegistry ABI exposes registerUsers"""
+    return any(item.get("name") == "registerUsers" for item in user_registry.abi)
+
+
+class CommitmentBatcher:
+    """
+    Coalesce commitments that arrive close together into a single
+    registerUsers transaction. Each caller awaits its own future.
+    """
+
+    def __init__(self, max_size: int = 50, max_wait: float = 0.5):
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+
+    async def register(self, commitment_hex: str) -> Dict:
+        """Queue a commitment; resolves to the receipt of the tx that registered it"""
+        loop = asyncio.get_running_loop()
+        # A fresh loop (e.g. a TestClient without a context manager) gets its own worker
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((commitment_hex, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        if len(batch) > 1 and _supports_batch_registration():
+            try:
+                result = await asyncio.to_thread(
+                    register_commitments_on_chain, [c for c, _ in batch]
+                )
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(dict(result))
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        # Single item (or an older contract without registerUsers)
+        for commitment_hex, future in batch:
+            try:
+                result = await asyncio.to_thread(register_commitment_on_chain, commitment_hex)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+
+commitment_batcher = CommitmentBatcher()
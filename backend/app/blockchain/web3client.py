@@ -1,47 +1,80 @@
-import os
-import json
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from web3 import Web3
-from dotenv import load_dotenv
 from pathlib import Path
+from functools import lru_cache
+from app.core.config import settings
 
-load_dotenv()
+# orjson parses the large Hardhat artifacts several times faster; stdlib is the fallback
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+logger = logging.getLogger(__name__)
 
-# Connect to Hardhat node
-web3 = Web3(Web3.HTTPProvider(os.environ["WEB3_PROVIDER_URL"]))
+def _http_session() -> requests.Session:
+    """Keep-alive session sized for concurrent contract calls from the threadpool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.WEB3_HTTP_POOL_SIZE,
+        pool_maxsize=settings.WEB3_HTTP_POOL_SIZE,
+        # Re-dial dropped keep-alive connections; never replay a request the
+        # node may already have read (web3 retries idempotent reads itself)
+        max_retries=Retry(total=3, connect=3, read=0, backoff_factor=0.1)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
+# Connect to Hardhat node over a pooled keep-alive session
+web3 = Web3(Web3.HTTPProvider(
+    settings.WEB3_PROVIDER_URL,
+    session=_http_session(),
+    request_kwargs={"timeout": settings.WEB3_REQUEST_TIMEOUT}
+))
+
+@lru_cache(maxsize=None)
 def load_contract_abi(contract_name: str):
-    """Load contract ABI from artifacts"""
+    """Load contract ABI from artifacts (parsed once per contract)"""
     # Navigate from backend/app/blockchain/ to blockchain/artifacts/
     current_dir = Path(__file__).parent
     project_root = current_dir.parent.parent.parent
     artifacts_path = project_root / "blockchain" / "artifacts" / "contracts" / f"{contract_name}.sol" / f"{contract_name}.json"
     
     try:
-        with open(artifacts_path, "r") as f:
-            artifact = json.load(f)
+        with open(artifacts_path, "rb") as f:
+            artifact = _json_loads(f.read())
             return artifact["abi"]
     except FileNotFoundError:
         raise FileNotFoundError(f"Contract artifact not found at {artifacts_path}")
 
+@lru_cache(maxsize=None)
+def _load_contract(contract_name: str, address_setting: str):
+    """Build a contract binding once; the address is checksummed a single time"""
+    address = getattr(settings, address_setting)
+    if not address:
+        raise RuntimeError(f"{address_setting} is not configured")
+    abi = load_contract_abi(contract_name)
+    return web3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+
 def get_user_registry_contract():
     """Get UserRegistry contract instance"""
-    abi = load_contract_abi("UserRegistry")
-    address = os.environ["USER_REGISTRY_ADDRESS"]
-    return web3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+    return _load_contract("UserRegistry", "USER_REGISTRY_ADDRESS")
 
 def get_token_system_contract():
     """Get TokenSystem contract instance"""
-    abi = load_contract_abi("TokenSystem")
-    address = os.environ["TOKEN_SYSTEM_ADDRESS"]
-    return web3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+    return _load_contract("TokenSystem", "TOKEN_SYSTEM_ADDRESS")
 
 # Test connection
 try:
-    print(f"✅ Connected to Web3. Latest block: {web3.eth.block_number}")
+    logger.info(f"✅ Connected to Web3. Latest block: {web3.eth.block_number}")
     user_registry = get_user_registry_contract()
     token_system = get_token_system_contract()
-    print("✅ Smart contracts loaded successfully")
+    logger.info("✅ Smart contracts loaded successfully")
 except Exception as e:
-    print(f"❌ Web3 connection failed: {e}")
+    logger.error(f"❌ Web3 connection failed: {e}")
     user_registry = None
     token_system = None
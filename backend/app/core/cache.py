@@ -0,0 +1,57 @@
+# backend/app/core/cache.py
+import logging
+from typing import Any, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Reputation changes at most every few minutes, so short-lived entries are safe
+REPUTATION_CACHE_TTL = 120
+REPUTATION_VIEWS = ("score", "breakdown")
+
+# Shared response cache - optional, every helper degrades to a no-op
+try:
+    from aiocache import Cache
+    response_cache = Cache.from_url(settings.REDIS_URL)
+    CACHE_ENABLED = True
+except Exception as e:
+    logger.warning(f"⚠️ Response cache disabled: {e}")
+    response_cache = None
+    CACHE_ENABLED = False
+
+
+def reputation_cache_key(view: str, commitment: str) -> str:
+    """Cache key for a user's reputation view"""
+    return f"rep:{view}:{commitment}"
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """Read a cached value, treating backend errors as a miss"""
+    if not CACHE_ENABLED:
+        return None
+    try:
+        return await response_cache.get(key)
+    except Exception as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+
+
+async def cache_set(key: str, value: Any, ttl: int) -> None:
+    """Store a value, ignoring backend errors"""
+    if not CACHE_ENABLED:
+        return
+    try:
+        await response_cache.set(key, value, ttl=ttl)
+    except Exception as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+
+async def invalidate_reputation(commitment: str) -> None:
+    """Drop every cached reputation view for a user"""
+    if not CACHE_ENABLED:
+        return
+    try:
+        for view in REPUTATION_VIEWS:
+            await response_cache.delete(reputation_cache_key(view, commitment))
+    except Exception as e:
+        logger.warning("Cache invalidation failed for %s...: %s", commitment[:8], e)
@@ -1,10 +1,26 @@
 # backend/app/crypto/identity.py
 import hashlib
+import hmac
+import logging
 import secrets
 from cryptography.fernet import Fernet
-from typing import Tuple, Dict
+from functools import lru_cache
+from typing import Tuple, Dict, Iterable, List, Optional, Union
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+def _blake2b_256():
+    return hashlib.blake2b(digest_size=32)
+
+def _commitment_digest(user_data: str, randomness: bytes, hasher=_blake2b_256):
+    """hash(user_data ":" randomness) fed piecewise, without building a joined string"""
+    h = hasher()
+    h.update(user_data.encode())
+    h.update(b":")
+    h.update(randomness)
+    return h
+
 class AnonymousIdentity:
     def __init__(self):
         # Generate or load encryption key
@@ -13,23 +29,31 @@ class AnonymousIdentity:
         else:
             key = Fernet.generate_key()
             self.cipher = Fernet(key)
-            print(f"Generated encryption key: {key.decode()}")
+            # Never log the key itself; data encrypted with it is unreadable after a restart
+            logger.warning("⚠️ ENCRYPTION_KEY is not set - generated a temporary key for this process")
     
     def create_commitment(self, user_data: str) -> Tuple[str, str]:
         """
         Create cryptographic commitment for anonymous user
         Returns: (commitment_hash, randomness)
         """
-        randomness = secrets.token_hex(32)
-        commitment_input = f"{user_data}:{randomness}"
-        commitment_hash = hashlib.sha256(commitment_input.encode()).hexdigest()
-        return commitment_hash, randomness
+        randomness = secrets.token_bytes(32)
+        commitment_hash = _commitment_digest(user_data, randomness).hexdigest()
+        return commitment_hash, randomness.hex()
     
     def verify_commitment(self, commitment: str, user_data: str, randomness: str) -> bool:
-        """Verify user commitment without revealing identity"""
-        expected_input = f"{user_data}:{randomness}"
-        expected_hash = hashlib.sha256(expected_input.encode()).hexdigest()
-        return commitment == expected_hash
+        """Verify user commitment without revealing identity (constant-time compare)"""
+        try:
+            given = bytes.fromhex(commitment)
+            raw_randomness = bytes.fromhex(randomness)
+        except ValueError:
+            return False
+        # Current scheme: BLAKE2b-256 over the raw random bytes.
+        # Legacy scheme: SHA-256 over the hex text - kept so older commitments still verify
+        current = _commitment_digest(user_data, raw_randomness).digest()
+        legacy = _commitment_digest(user_data, randomness.encode(), hashlib.sha256).digest()
+        # Evaluate both - no short-circuit on which one matched
+        return hmac.compare_digest(given, current) | hmac.compare_digest(given, legacy)
     
     def encrypt_sensitive_data(self, data: str) -> str:
         """Encrypt sensitive user data"""
@@ -39,7 +63,35 @@ class AnonymousIdentity:
         """Decrypt sensitive user data"""
         return self.cipher.decrypt(encrypted_data.encode()).decode()
     
-    def generate_session_hash(self, participants: list) -> str:
-        """Generate unique hash for peer sessions"""
-        session_data = ":".join(sorted(participants)) + ":" + secrets.token_hex(16)
-        return hashlib.sha256(session_data.encode()).hexdigest()
+    def decrypt_sensitive_data_batch(self, encrypted_items: Iterable[str]) -> List[Optional[str]]:
+        """Decrypt many tokens with the shared cipher; None for any that fail"""
+        decrypt = self.cipher.decrypt
+        plains = []
+        for token in encrypted_items:
+            try:
+                plains.append(decrypt(token.encode()).decode())
+            except Exception:
+                plains.append(None)
+        return plains
+    
+    def generate_session_hash(self, participants: Iterable[Union[str, bytes]]) -> str:
+        """
+        Generate unique hash for peer sessions.
+        Participants are all hex strings or all raw bytes (bytes skip the encode).
+        """
+        h = hashlib.blake2b(digest_size=32)
+        for participant in sorted(participants):
+            h.update(participant if isinstance(participant, bytes) else participant.encode())
+            h.update(b":")
+        h.update(secrets.token_bytes(16))
+        return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def get_identity() -> AnonymousIdentity:
+    """
+    Process-wide AnonymousIdentity. Without ENCRYPTION_KEY each instance
+    generates its own Fernet key, so every service must share this one to
+    decrypt what the others encrypted.
+    """
+    return AnonymousIdentity()
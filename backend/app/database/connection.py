@@ -1,14 +1,38 @@
 # backend/app/database/connection.py
 
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import String, create_engine, inspect, make_url, text
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 from app.core.config import settings
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
+def _engine_options(url: str) -> dict:
+    """Connection pool settings for the configured backend"""
+    if url.startswith("sqlite"):
+        # SQLite pools are file/thread based - server-style tuning doesn't apply
+        return {"connect_args": {"check_same_thread": False}}
+    if settings.DB_PGBOUNCER:
+        # PgBouncer owns the pooling - hold no idle connections here
+        options = {"poolclass": NullPool}
+        if make_url(url).get_driver_name() == "psycopg":
+            # psycopg 3 auto-prepares statements, which breaks under transaction pooling
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+    return {
+        "poolclass": QueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        # Reuse the most recently returned connection so surplus idle ones
+        # age out instead of being cycled through (and pre-pinged) in turn
+        "pool_use_lifo": True,
+    }
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -19,7 +43,95 @@ def create_tables() -> None:
     # Import all models so Base.metadata knows about them
     from app.models.user import User, MoodEntry, PeerSession, SessionMatch
     
-    Base.metadata.create_all(bind=engine)
+    # One Base, one metadata: any stray model module would show up here
+    models = (User, MoodEntry, PeerSession, SessionMatch)
+    assert set(Base.metadata.tables) == {m.__tablename__ for m in models}, (
+        f"Unexpected tables registered on Base: {sorted(Base.metadata.tables)}"
+    )
+    
+    if engine.dialect.name == "postgresql":
+        # Trigram operator classes used by the session topic index
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    
+    # One inspector for every schema check below (it caches what it reflects)
+    inspector = inspect(engine)
+    if not set(Base.metadata.tables) <= set(inspector.get_table_names()):
+        Base.metadata.create_all(bind=engine)
+        inspector = inspect(engine)
+    _add_missing_generated_columns(inspector)
+    _add_entry_date_column(inspector)
+    _convert_commitment_columns(inspector)
+    _create_missing_indexes(inspector)
+
+def _add_missing_generated_columns(inspector) -> None:
+    """Add generated columns to tables created before they existed"""
+    columns = {c["name"] for c in inspector.get_columns("peer_sessions")}
+    if "spots_available" in columns:
+        return
+    # SQLite can only ALTER in VIRTUAL generated columns; Postgres only STORED
+    storage = "VIRTUAL" if engine.dialect.name == "sqlite" else "STORED"
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE peer_sessions ADD COLUMN spots_available INTEGER "
+            f"GENERATED ALWAYS AS (max_participants - participant_count) {storage}"
+        ))
+
+def _add_entry_date_column(inspector) -> None:
+    """Add mood_entries.entry_date to older tables and backfill it (UTC day)"""
+    columns = {c["name"] for c in inspector.get_columns("mood_entries")}
+    if "entry_date" in columns:
+        # New rows get entry_date from the model default - no full-table backfill per startup
+        return
+    if engine.dialect.name == "postgresql":
+        utc_day = "(timestamp AT TIME ZONE 'UTC')::date"
+    else:
+        utc_day = "date(timestamp)"
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE mood_entries ADD COLUMN entry_date DATE"))
+        conn.execute(text(
+            f"UPDATE mood_entries SET entry_date = {utc_day} "
+            "WHERE timestamp IS NOT NULL"
+        ))
+
+# Columns stored as BYTEA on PostgreSQL (see app.models.types.Commitment)
+_COMMITMENT_COLUMNS = (
+    ("users", "commitment"),
+    ("mood_entries", "user_commitment"),
+    ("peer_sessions", "creator_commitment"),
+    ("session_matches", "matched_user_commitment"),
+)
+
+def _convert_commitment_columns(inspector) -> None:
+    """Convert hex text commitments left by older PostgreSQL schemas to BYTEA"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table, column in _COMMITMENT_COLUMNS:
+            col = next(c for c in inspector.get_columns(table) if c["name"] == column)
+            if isinstance(col["type"], String):
+                conn.execute(text(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} "
+                    f"TYPE BYTEA USING decode({column}, 'hex')"
+                ))
+
+# Indexes older schemas created that a declared index now covers
+_SUPERSEDED_INDEXES = {
+    "ix_user_commitment_covering": "ix_users_commitment",
+    "ix_mood_user_ts": "ix_mood_entries_user_commitment",
+}
+
+def _create_missing_indexes(inspector) -> None:
+    """create_all skips existing tables, so add indexes declared on them later"""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=conn, checkfirst=True)
+                old_name = _SUPERSEDED_INDEXES.get(index.name)
+                if old_name in existing:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {old_name}"))
 
 def get_db():
     """Database dependency for FastAPI"""
@@ -0,0 +1,33 @@
+# backend/app/models/types.py
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import BYTEA
+from sqlalchemy.types import TypeDecorator
+
+
+class Commitment(TypeDecorator):
+    """
+    32-byte commitment hash. Python code always sees the 64-char hex string;
+    on PostgreSQL it is stored as raw BYTEA (half the index size, same bytes
+    as on-chain). Other backends keep the hex text column.
+    """
+    impl = String(64)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(BYTEA())
+        return dialect.type_descriptor(String(64))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "postgresql":
+            return value
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            # Not a hex commitment (e.g. bad login input) - can never match a stored row
+            return value.encode()
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name != "postgresql":
+            return value
+        return bytes(value).hex()
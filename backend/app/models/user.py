@@ -1,9 +1,11 @@
 # backend/app/models/user.py
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text, Float, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Integer, Date, DateTime, Boolean, Text, Float, ForeignKey, Index, Computed, and_
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 # Import Base from connection.py instead of creating new one
 from app.database.connection import Base
+from app.models.types import Commitment
 
 
 class User(Base):
@@ -11,7 +13,7 @@ class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
-    commitment = Column(String(64), unique=True, index=True, nullable=False)  # renamed from commitment_hash
+    commitment = Column(Commitment, nullable=False)  # renamed from commitment_hash
     age_range = Column(String(20), nullable=True)  # Added for user registration
     topics = Column(Text, nullable=True)  # JSON string of topics
     severity_level = Column(String(20), nullable=True)  # Added for matching
@@ -26,13 +28,40 @@ class User(Base):
     mood_entries = relationship("MoodEntry", back_populates="user", cascade="all, delete-orphan")
     sessions = relationship("PeerSession", back_populates="creator", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Unique commitment lookup; on Postgres the INCLUDE columns make
+        # get_current_user an index-only scan
+        Index(
+            "ix_user_commitment_covering", commitment, unique=True,
+            postgresql_include=["id", "topics", "severity_level", "age_range", "is_active"]
+        ),
+        # Leaderboard scan: active users ordered by reputation
+        Index("ix_user_rep", reputation_score.desc(), postgresql_where=(is_active == True)),
+        # Peer matching equality filters
+        Index("ix_users_match", is_active, severity_level, age_range),
+        # Trigram index so the per-topic ILIKE '%...%' filters can avoid a seq scan
+        Index(
+            "ix_users_topics_trgm", topics,
+            postgresql_using="gin",
+            postgresql_ops={"topics": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+def _entry_date(context):
+    """UTC calendar day of the entry - the explicit timestamp if given, else now"""
+    ts = context.get_current_parameters().get("timestamp")
+    if ts is None:
+        return datetime.now(timezone.utc).date()
+    return (ts.astimezone(timezone.utc) if ts.tzinfo else ts).date()
+
 
 class MoodEntry(Base):
     __tablename__ = "mood_entries"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Foreign key relationship
-    user_commitment = Column(String(64), nullable=False, index=True)  # Keep for quick lookups
+    user_commitment = Column(Commitment, nullable=False)  # Keep for quick lookups (ix_mood_user_ts)
     encrypted_data = Column(Text, nullable=False)
     mood_score = Column(Float, nullable=False)  # 1-10 scale
     description = Column(Text, nullable=True)  # Added for crisis detection
@@ -42,7 +71,16 @@ class MoodEntry(Base):
     needs_intervention = Column(Boolean, default=False)  # Crisis flag
     crisis_flag = Column(Boolean, default=False)  # Keep your original field
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
-    
+    # Stored at write time so distinct-day counts don't re-derive date(timestamp) per row
+    entry_date = Column(Date, default=_entry_date)
+
+    __table_args__ = (
+        # Per-user history newest first: a bounded range scan instead of filter + sort
+        Index("ix_mood_user_ts", user_commitment, timestamp.desc()),
+        # Same shape for /mood/analysis, which filters by user_id
+        Index("ix_mood_userid_ts", user_id, timestamp.desc()),
+    )
+
     # Relationships
     user = relationship("User", back_populates="mood_entries")
 
@@ -53,9 +91,10 @@ class PeerSession(Base):
     id = Column(Integer, primary_key=True, index=True)
     session_hash = Column(String(64), unique=True, index=True, nullable=False)
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Foreign key
-    creator_commitment = Column(String(64), nullable=False)  # Keep for quick lookups
+    creator_commitment = Column(Commitment, nullable=False)  # Keep for quick lookups
     participant_count = Column(Integer, default=1)
     max_participants = Column(Integer, default=4)
+    spots_available = Column(Integer, Computed("max_participants - participant_count", persisted=True))
     status = Column(String(20), default="active")  # active, full, ended
     topic = Column(String(100), nullable=True)
     session_type = Column(String(50), default="group")  # one-on-one, group
@@ -68,7 +107,28 @@ class PeerSession(Base):
     
     # Relationships
     creator = relationship("User", back_populates="sessions")
-    matches = relationship("SessionMatch", back_populates="session", cascade="all, delete-orphan")
+    # Batched into one "session_id IN (...)" query whenever sessions are loaded, never N+1
+    matches = relationship("SessionMatch", back_populates="session", cascade="all, delete-orphan", lazy="selectin")
+
+    __table_args__ = (
+        # Open-session discovery: status + topic among sessions with free spots
+        Index(
+            "ix_peersession_status_topic", status, topic,
+            postgresql_where=(spots_available > 0)
+        ),
+        # Newest open sessions first
+        Index(
+            "ix_peersession_open", created_at.desc(),
+            postgresql_where=and_(status == "active", spots_available > 0)
+        ),
+        # Trigram index so topic ILIKE '%...%' can avoid a seq scan (needs pg_trgm)
+        Index(
+            "ix_peersession_topic_trgm", topic,
+            postgresql_using="gin",
+            postgresql_ops={"topic": "gin_trgm_ops"},
+            postgresql_where=status.in_(["active", "scheduled"])
+        ).ddl_if(dialect="postgresql"),
+    )
 
 
 class SessionMatch(Base):
@@ -77,7 +137,7 @@ class SessionMatch(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("peer_sessions.id"), nullable=False)
-    matched_user_commitment = Column(String(64), nullable=False)
+    matched_user_commitment = Column(Commitment, nullable=False)
     compatibility_score = Column(Float, nullable=False)
     match_factors = Column(Text, nullable=True)  # JSON string of matching factors
     status = Column(String(20), default="pending")  # pending, accepted, declined
@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from app.database.connection import get_db
-from app.services.auth import AuthService
+from app.api.deps import get_current_user, get_peer_service, get_peer_service_class
 from app.models.user import User, PeerSession, SessionMatch
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import logging
+import numpy as np
+from app.ai.utils.stats import match_scores
 from datetime import datetime
+from dataclasses import dataclass
 
 router = APIRouter()
-auth_service = AuthService()
 logger = logging.getLogger(__name__)
 
 # =================== PYDANTIC MODELS ===================
@@ -24,47 +28,28 @@ class ConnectionRequest(BaseModel):
     peer_id: str
     message: Optional[str] = "Hi! I'd like to connect and support each other."
 
-# =================== DEPENDENCY FUNCTIONS ===================
-
-def get_current_user_commitment(token: str = Depends(auth_service.verify_token)) -> str:
-    """Extract user commitment from token"""
-    try:
-        if isinstance(token, dict):
-            return token.get("commitment")
-        return token
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication token"
-        )
+@dataclass(slots=True)
+class PeerMatch:
+    """One basic-matching result - serialized directly by orjson"""
+    id: str
+    anonymous_id: str
+    match_score: int
+    common_topics: List[str]
+    last_active: datetime
+    reputation_level: str = "Trusted"
+    is_online: bool = True
 
-def get_peer_matcher(db: Session = Depends(get_db)):
-    """✅ MISSING FUNCTION - Lazy load PeerService to avoid circular imports"""
-    try:
-        from app.ai.services.peer_service import PeerService
-        return PeerService(db)
-    except ImportError as e:
-        logger.warning(f"PeerService not available: {e}")
-        return None
+# =================== DEPENDENCY FUNCTIONS ===================
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    user_commitment: str = Depends(get_current_user_commitment)
-) -> User:
-    """Get current user from database"""
-    user = db.query(User).filter(User.commitment == user_commitment).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    return user
+# PeerService class is resolved once at startup (see deps.load_peer_service_class)
+get_peer_matcher = get_peer_service
 
 # =================== ENDPOINTS ===================
 
 @router.post("/find")
-async def find_peer_matches(
+def find_peer_matches(
     criteria: PeerMatchingRequest,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     peer_matcher = Depends(get_peer_matcher)  # ✅ Now properly injected
 ):
@@ -97,14 +82,16 @@ async def find_peer_matches(
         # Fallback to basic matching if AI fails or unavailable
         if not matches:
             logger.info("Using fallback basic matching")
-            matches = basic_peer_matching(current_user, criteria)
+            matches = basic_peer_matching(current_user, criteria, db)
         
-        return {
+        # Returned as a response so FastAPI skips jsonable_encoder; orjson
+        # encodes the PeerMatch dataclasses and datetimes itself
+        return ORJSONResponse({
             "matches": matches,
             "total_found": len(matches),
             "matching_algorithm": "AI-powered" if peer_matcher else "Basic compatibility",
             "privacy_note": "All matches are anonymous and secure"
-        }
+        })
         
     except HTTPException:
         raise
@@ -115,64 +102,66 @@ async def find_peer_matches(
             detail=f"Failed to find matches: {str(e)}"
         )
 
-def basic_peer_matching(current_user: User, criteria: PeerMatchingRequest) -> List[Dict]:
+def _topic_mask(topics: Optional[str], bits: Dict[str, int]) -> int:
+    """OR together the bits of the requested topics this user lists"""
+    mask = 0
+    if bits and topics:
+        for t in topics.split(','):
+            mask |= bits.get(t.strip().lower(), 0)
+    return mask
+
+def basic_peer_matching(current_user: User, criteria: PeerMatchingRequest, db: Session) -> List[PeerMatch]:
     """Fallback basic matching when PeerService is unavailable"""
     try:
-        from app.database.connection import get_db
-        
-        # Get a database session for basic matching
-        db = next(get_db())
-        
-        query = db.query(User).filter(
+        # Tokenize the requested topics once, not per candidate row
+        topic_list = [t.strip() for t in criteria.topics.split(',')] if criteria.topics else []
+        criteria_topics = frozenset(t.lower() for t in topic_list if t)
+        
+        # Only the columns the scorer and response need - plain rows, no ORM entities
+        query = select(
+            User.id, User.topics, User.severity_level, User.age_range, User.updated_at
+        ).where(
             User.commitment != current_user.commitment,
             User.is_active == True
         )
         
         # Apply basic filters
-        if criteria.topics:
-            topic_list = [t.strip() for t in criteria.topics.split(',')]
-            for topic in topic_list:
-                if topic:
-                    query = query.filter(User.topics.ilike(f"%{topic}%"))
+        for topic in topic_list:
+            if topic:
+                query = query.where(User.topics.ilike(f"%{topic}%"))
         
         if criteria.severity_level:
-            query = query.filter(User.severity_level == criteria.severity_level)
+            query = query.where(User.severity_level == criteria.severity_level)
         
         if criteria.age_range:
-            query = query.filter(User.age_range == criteria.age_range)
+            query = query.where(User.age_range == criteria.age_range)
         
-        similar_users = query.limit(10).all()
+        similar_users = db.execute(query.limit(10)).all()
+        if not similar_users:
+            return []
         
-        matches = []
-        for user in similar_users:
-            # Calculate basic compatibility score
-            score = 50  # Base score
-            
-            common_topics = []
-            if criteria.topics and user.topics:
-                user_topics = set(t.strip().lower() for t in criteria.topics.split(','))
-                similar_topics = set(t.strip().lower() for t in user.topics.split(','))
-                common_topics = list(user_topics.intersection(similar_topics))
-                score += len(common_topics) * 15
-            
-            if criteria.severity_level == user.severity_level:
-                score += 25
-            
-            if criteria.age_range == user.age_range:
-                score += 15
-            
-            matches.append({
-                "id": str(user.id),
-                "anonymous_id": f"User_{user.id}",
-                "match_score": min(score, 100),
-                "common_topics": common_topics,
-                "last_active": user.updated_at.isoformat() if user.updated_at else datetime.utcnow().isoformat(),
-                "reputation_level": "Trusted",
-                "is_online": True
-            })
+        # One bit per requested topic (the topic filters above already cap this list)
+        bits = {topic: 1 << i for i, topic in enumerate(list(criteria_topics)[:64])}
+        masks = [_topic_mask(user.topics, bits) for user in similar_users]
+        
+        scores = match_scores(
+            np.array(masks, dtype=np.uint64),
+            np.array([user.severity_level == criteria.severity_level for user in similar_users]),
+            np.array([user.age_range == criteria.age_range for user in similar_users])
+        )
+        common_topics = [[topic for topic, bit in bits.items() if mask & bit] for mask in masks]
         
-        # Sort by match score
-        matches.sort(key=lambda x: x["match_score"], reverse=True)
+        # Highest score first, ties keep query order
+        matches = []
+        for i in np.argsort(-scores, kind="stable"):
+            user = similar_users[i]
+            matches.append(PeerMatch(
+                id=str(user.id),
+                anonymous_id=f"User_{user.id}",
+                match_score=int(scores[i]),
+                common_topics=common_topics[i],
+                last_active=user.updated_at or datetime.utcnow()
+            ))
         return matches
         
     except Exception as e:
@@ -180,7 +169,7 @@ def basic_peer_matching(current_user: User, criteria: PeerMatchingRequest) -> Li
         return []
 
 @router.post("/connect")
-async def send_connection_request(
+def send_connection_request(
     connection_data: ConnectionRequest,
     current_user: User = Depends(get_current_user),
     peer_matcher = Depends(get_peer_matcher)
@@ -219,7 +208,7 @@ async def send_connection_request(
         )
 
 @router.get("/requests")
-async def get_connection_requests(
+def get_connection_requests(
     current_user: User = Depends(get_current_user),
     peer_matcher = Depends(get_peer_matcher)
 ):
@@ -243,14 +232,9 @@ async def get_connection_requests(
         )
 
 @router.get("/health")
-async def peer_matching_health():
+async def peer_matching_health(peer_service_cls = Depends(get_peer_service_class)):
     """Health check for peer matching service"""
-    try:
-        # Test if PeerService can be imported
-        from app.ai.services.peer_service import PeerService
-        ai_available = True
-    except ImportError:
-        ai_available = False
+    ai_available = peer_service_cls is not None
     
     return {
         "service": "peer_matching",
@@ -1,14 +1,36 @@
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+import jwt
+from jwt import ExpiredSignatureError, InvalidTokenError
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
 import hashlib
 import secrets
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
 
 # Security scheme for JWT
 security = HTTPBearer()
 
+
+@dataclass(slots=True)
+class AuthPrincipal:
+    """Authenticated caller resolved from a bearer token"""
+    commitment: str
+
+
+@lru_cache(maxsize=8192)
+def _decode_token_claims(token: str, secret_key: str, algorithm: str) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Verify a JWT and return (commitment, exp). Memoized per token string;
+    invalid or expired tokens raise InvalidTokenError and are never cached.
+    """
+    payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+    return payload.get("commitment"), payload.get("exp")
+
+
 class AuthService:
     def __init__(self):
         self.secret_key = getattr(settings, 'SECRET_KEY', 'your-secret-key-here-change-this-in-production')
@@ -18,9 +40,10 @@ class AuthService:
     def register_anonymous_user(self, user_data: dict):
         """Register anonymous user and return commitment + token"""
         # Generate anonymous commitment
-        random_data = secrets.token_hex(32)
-        commitment_data = f"{user_data}_{random_data}_{datetime.utcnow()}"
-        commitment = hashlib.sha256(commitment_data.encode()).hexdigest()
+        h = hashlib.sha256(f"{user_data}_".encode())
+        h.update(secrets.token_bytes(32))
+        h.update(f"_{datetime.utcnow()}".encode())
+        commitment = h.hexdigest()
         
         # Create access token
         access_token = self.create_access_token({"commitment": commitment})
@@ -39,20 +62,22 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
     
-    def verify_token(self, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    def verify_token(self, credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuthPrincipal:
         """Verify JWT token from Authorization header"""
         try:
             token = credentials.credentials
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            commitment: str = payload.get("commitment")
+            commitment, exp = _decode_token_claims(token, self.secret_key, self.algorithm)
+            # A cached token may have expired since it was first decoded
+            if exp is not None and exp <= time.time():
+                raise ExpiredSignatureError("Signature has expired")
             if commitment is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid authentication credentials",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
-            return commitment
-        except JWTError:
+            return AuthPrincipal(commitment=commitment)
+        except InvalidTokenError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
@@ -72,7 +97,7 @@ class AuthService:
                     headers={"WWW-Authenticate": "Bearer"},
                 )
             return {"commitment": commitment}
-        except JWTError:
+        except InvalidTokenError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
@@ -84,5 +109,5 @@ class AuthService:
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
             return payload.get("commitment")
-        except JWTError:
+        except InvalidTokenError:
             return None
@@ -1,7 +1,68 @@
-import os
+import logging
+import time
 from web3 import Web3
+from eth_abi import decode as abi_decode
+from eth_utils import function_signature_to_4byte_selector
+from app.core.config import settings
 from app.blockchain.web3client import web3, get_user_registry_contract, get_token_system_contract
-from typing import Optional, Dict
+from app.blockchain.nonce import get_nonce_manager
+from app.blockchain.confirmer import receipt_confirmer
+from app.blockchain.fees import fee_params
+from typing import Optional, Dict, List, Tuple
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _account_from_key(private_key: str):
+    """Derive the signer once per key - every BlockchainService shares it"""
+    return web3.eth.account.from_key(private_key)
+
+
+# users() reads are cached for about one block (Hardhat/mainnet ~12s)
+USERS_CALL_TTL = 12
+# Status probes (health checks) reuse one RPC snapshot for this long
+STATUS_CACHE_TTL = 2
+
+
+@lru_cache(maxsize=None)
+def _users_read_plan() -> Tuple[str, bytes, Tuple[str, ...]]:
+    """Target, selector and output types for users(bytes32), resolved from the ABI once"""
+    contract = get_user_registry_contract()
+    fn_abi = next(
+        item for item in contract.abi
+        if item.get("type") == "function" and item.get("name") == "users"
+    )
+    selector = function_signature_to_4byte_selector("users(bytes32)")
+    return contract.address, selector, tuple(o["type"] for o in fn_abi["outputs"])
+
+
+@lru_cache(maxsize=4096)
+def _users_call(commitment_bytes: bytes, ttl_bucket: int) -> tuple:
+    """UserRegistry.users(commitment); ttl_bucket rolls over every USERS_CALL_TTL seconds"""
+    # Raw eth_call + eth_abi decode skips the ContractFunction build on every read
+    to, selector, output_types = _users_read_plan()
+    raw = web3.eth.call({'to': to, 'data': selector + commitment_bytes})
+    return abi_decode(output_types, raw)
+
+
+def _cached_user(commitment_bytes: bytes) -> tuple:
+    return _users_call(commitment_bytes, int(time.monotonic() // USERS_CALL_TTL))
+
+
+def _supports_batch_reward(token_system) -> bool:
+    """True when the deployed TokenSystem ABI exposes rewardUsers"""
+    return any(item.get("name") == "rewardUsers" for item in token_system.abi)
+
+
+def _hex_to_bytes32(commitment_hex: str) -> Optional[bytes]:
+    """Decode a 64-digit hex commitment (0x optional) to bytes32; None if malformed"""
+    try:
+        raw = bytes.fromhex(commitment_hex[2:] if commitment_hex[:2] == '0x' else commitment_hex)
+    except ValueError:
+        return None
+    return raw if len(raw) == 32 else None
 
 
 class BlockchainService:
@@ -11,43 +72,41 @@ class BlockchainService:
         self.token_system = get_token_system_contract()
         
         # ✅ Fix: Better environment variable handling
-        self.private_key = os.getenv("PRIVATE_KEY", "0x" + "a" * 64)  # Fallback for testing
+        self.private_key = settings.PRIVATE_KEY or "0x" + "a" * 64  # Fallback for testing
         
         # ✅ Fix: Validate private key format
         if not self.private_key.startswith('0x'):
             self.private_key = '0x' + self.private_key
             
-        self.account = self.web3.eth.account.from_key(self.private_key)
-        print(f"✅ Blockchain service initialized with account: {self.account.address}")
+        # Contract bindings above are cached in web3client; the signer is cached here
+        self.account = _account_from_key(self.private_key)
+        self._nonce_mgr = get_nonce_manager(self.account.address)
+        self._register_fn = self.user_registry.functions.registerUser if self.user_registry else None
+        self._status_cache = (0.0, None)
+        logger.info(f"✅ Blockchain service initialized with account: {self.account.address}")
 
     def register_user_commitment(self, commitment_hex: str) -> Optional[Dict]:
         """Register user commitment on blockchain"""
         try:
-            print(f"🔗 Registering commitment: {commitment_hex}")
-            
-            # ✅ Fix: Better hex string handling
-            if commitment_hex.startswith('0x'):
-                commitment_hex = commitment_hex[2:]  # Remove 0x prefix
-            
-            # Ensure it's exactly 64 characters (32 bytes)
-            if len(commitment_hex) != 64:
-                print(f"❌ Invalid commitment length: {len(commitment_hex)}, expected 64")
-                return None
-            
-            # Convert hex string to bytes32
-            commitment_bytes = Web3.to_bytes(hexstr='0x' + commitment_hex)
+            logger.debug("🔗 Registering commitment: %s", commitment_hex)
             
             # ✅ Fix: Add contract existence check
             if not self.user_registry:
-                print("❌ User registry contract not available")
+                logger.error("❌ User registry contract not available")
+                return None
+            
+            # Must decode to exactly 32 bytes (bytes32)
+            commitment_bytes = _hex_to_bytes32(commitment_hex)
+            if commitment_bytes is None:
+                logger.error(f"❌ Invalid commitment: {len(commitment_hex)} chars, expected 64 hex digits")
                 return None
             
             # Build transaction
-            txn = self.user_registry.functions.registerUser(commitment_bytes).build_transaction({
+            txn = self._register_fn(commitment_bytes).build_transaction({
                 'from': self.account.address,
-                'nonce': self.web3.eth.get_transaction_count(self.account.address),
+                'nonce': self._nonce_mgr.acquire(),
                 'gas': 300000,  # ✅ Increased gas limit
-                'gasPrice': self.web3.to_wei('20', 'gwei')
+                **fee_params()
             })
             
             # Sign transaction
@@ -55,11 +114,16 @@ class BlockchainService:
             
             # Send transaction
             tx_hash = self.web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            print(f"📤 Transaction sent: {self.web3.to_hex(tx_hash)}")
+            logger.info(f"📤 Transaction sent: {self.web3.to_hex(tx_hash)}")
+            _users_call.cache_clear()  # don't serve a stale "not registered"
             
-            # Wait for transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-            print(f"✅ Transaction confirmed: Block {receipt['blockNumber']}")
+            # Wait for transaction receipt (the default 0.1s poll hammers the node)
+            receipt = self.web3.eth.wait_for_transaction_receipt(
+                tx_hash,
+                timeout=settings.TX_RECEIPT_TIMEOUT,
+                poll_latency=settings.TX_POLL_LATENCY
+            )
+            logger.info(f"✅ Transaction confirmed: Block {receipt['blockNumber']}")
             
             return {
                 'tx_hash': self.web3.to_hex(tx_hash),
@@ -68,85 +132,74 @@ class BlockchainService:
                 'status': receipt['status']
             }
             
-        except Exception as e:
-            print(f"❌ Blockchain registration error: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            self._nonce_mgr.reset()
+            logger.exception("❌ Blockchain registration error")
             return None
 
     def get_user_reputation(self, commitment_hex: str) -> int:
         """Get user reputation from blockchain"""
         try:
-            # ✅ Fix: Standardize hex format
-            if commitment_hex.startswith('0x'):
-                commitment_hex = commitment_hex[2:]
-            
-            if len(commitment_hex) != 64:
-                print(f"❌ Invalid commitment format for reputation lookup: {len(commitment_hex)}")
-                return 100  # Default reputation
-            
             # ✅ Fix: Add contract check
             if not self.user_registry:
-                print("⚠️ User registry not available, returning default reputation")
+                logger.warning("⚠️ User registry not available, returning default reputation")
                 return 100
             
-            commitment_bytes = Web3.to_bytes(hexstr='0x' + commitment_hex)
+            commitment_bytes = _hex_to_bytes32(commitment_hex)
+            if commitment_bytes is None:
+                logger.error(f"❌ Invalid commitment format for reputation lookup: {len(commitment_hex)}")
+                return 100  # Default reputation
             
             # ✅ Fix: Better error handling for contract call
             try:
-                user_data = self.user_registry.functions.users(commitment_bytes).call()
-                print(f"📊 User data from blockchain: {user_data}")
+                user_data = _cached_user(commitment_bytes)
+                logger.debug("📊 User data from blockchain: %s", user_data)
                 
                 # Check if user exists (assuming index 3 is 'active' field)
                 if len(user_data) > 3 and user_data[3]:  # User is active
                     reputation = user_data[1] if len(user_data) > 1 else 100
-                    print(f"✅ Retrieved reputation: {reputation}")
+                    logger.info(f"✅ Retrieved reputation: {reputation}")
                     return reputation
                 else:
-                    print("⚠️ User not found on blockchain, returning default")
+                    logger.warning("⚠️ User not found on blockchain, returning default")
                     return 100
                     
             except Exception as contract_error:
-                print(f"⚠️ Contract call failed: {contract_error}")
+                logger.warning(f"⚠️ Contract call failed: {contract_error}")
                 return 100
                 
         except Exception as e:
-            print(f"❌ Error getting user reputation: {e}")
+            logger.error(f"❌ Error getting user reputation: {e}")
             return 100  # ✅ Always return default instead of 0
 
     def check_user_exists(self, commitment_hex: str) -> bool:
         """Check if user commitment exists on blockchain"""
         try:
-            # ✅ Fix: Standardize hex format
-            if commitment_hex.startswith('0x'):
-                commitment_hex = commitment_hex[2:]
-            
-            if len(commitment_hex) != 64:
-                print(f"❌ Invalid commitment format for existence check: {len(commitment_hex)}")
-                return False
-            
             # ✅ Fix: Add contract check
             if not self.user_registry:
-                print("⚠️ User registry not available")
+                logger.warning("⚠️ User registry not available")
                 return False
             
-            commitment_bytes = Web3.to_bytes(hexstr='0x' + commitment_hex)
+            commitment_bytes = _hex_to_bytes32(commitment_hex)
+            if commitment_bytes is None:
+                logger.error(f"❌ Invalid commitment format for existence check: {len(commitment_hex)}")
+                return False
             
             try:
-                user_data = self.user_registry.functions.users(commitment_bytes).call()
-                print(f"👤 User existence check: {user_data}")
+                user_data = _cached_user(commitment_bytes)
+                logger.debug("👤 User existence check: %s", user_data)
                 
                 # Return active field (assuming index 3 is 'active')
                 exists = len(user_data) > 3 and user_data[3]
-                print(f"✅ User exists on chain: {exists}")
+                logger.info(f"✅ User exists on chain: {exists}")
                 return exists
                 
             except Exception as contract_error:
-                print(f"⚠️ Contract existence check failed: {contract_error}")
+                logger.warning(f"⚠️ Contract existence check failed: {contract_error}")
                 return False
                 
         except Exception as e:
-            print(f"❌ Error checking user existence: {e}")
+            logger.error(f"❌ Error checking user existence: {e}")
             return False
 
     def reward_user(self, user_address: str, amount: int) -> Optional[str]:
@@ -154,14 +207,14 @@ class BlockchainService:
         try:
             # ✅ Fix: Add contract check
             if not self.token_system:
-                print("❌ Token system contract not available")
+                logger.error("❌ Token system contract not available")
                 return None
             
             # ✅ Fix: Validate address format
             try:
                 checksum_address = Web3.to_checksum_address(user_address)
             except ValueError as e:
-                print(f"❌ Invalid address format: {e}")
+                logger.error(f"❌ Invalid address format: {e}")
                 return None
             
             txn = self.token_system.functions.reward(
@@ -169,34 +222,101 @@ class BlockchainService:
                 amount
             ).build_transaction({
                 'from': self.account.address,
-                'nonce': self.web3.eth.get_transaction_count(self.account.address),
+                'nonce': self._nonce_mgr.acquire(),
                 'gas': 100000,
-                'gasPrice': self.web3.to_wei('20', 'gwei')
+                **fee_params()
             })
             
             signed_txn = self.account.sign_transaction(txn)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_hash = self.web3.eth.send_raw_transaction(signed_txn.raw_transaction)
             
-            print(f"🎁 Token reward sent: {self.web3.to_hex(tx_hash)}")
+            # Callers only need the hash - confirmation happens in the background
+            receipt_confirmer.submit(tx_hash, f"reward {amount} -> {checksum_address}")
+            logger.info(f"🎁 Token reward sent: {self.web3.to_hex(tx_hash)}")
             return self.web3.to_hex(tx_hash)
             
-        except Exception as e:
-            print(f"❌ Token reward error: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            self._nonce_mgr.reset()
+            logger.exception("❌ Token reward error")
             return None
 
+    def reward_users_batch(self, user_addresses: List[str], amounts: List[int]) -> List[str]:
+        """
+        Reward several users with one rewardUsers transaction. Older
+        TokenSystem deployments without rewardUsers get one reward() each.
+        Returns the hashes of the transactions sent.
+        """
+        if not self.token_system or not user_addresses:
+            return []
+        
+        if not _supports_batch_reward(self.token_system):
+            tx_hashes = (self.reward_user(a, amt) for a, amt in zip(user_addresses, amounts))
+            return [tx for tx in tx_hashes if tx]
+        
+        # A malformed address only costs its own reward, not the whole batch
+        checksum_addresses, valid_amounts = [], []
+        for address, amount in zip(user_addresses, amounts):
+            try:
+                checksum_addresses.append(Web3.to_checksum_address(address))
+            except ValueError as e:
+                logger.error("❌ Invalid address format in reward batch, skipping %s: %s", address, e)
+                continue
+            valid_amounts.append(amount)
+        if not checksum_addresses:
+            return []
+        
+        try:
+            txn = self.token_system.functions.rewardUsers(
+                checksum_addresses,
+                valid_amounts
+            ).build_transaction({
+                'from': self.account.address,
+                'nonce': self._nonce_mgr.acquire(),
+                'gas': 30000 + 50000 * len(checksum_addresses),
+                **fee_params()
+            })
+            
+            signed_txn = self.account.sign_transaction(txn)
+            tx_hash = self.web3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            
+            receipt_confirmer.submit(tx_hash, f"reward batch of {len(checksum_addresses)}")
+            logger.info(f"🎁 Token reward batch sent ({len(checksum_addresses)} users): {self.web3.to_hex(tx_hash)}")
+            return [self.web3.to_hex(tx_hash)]
+            
+        except Exception:
+            self._nonce_mgr.reset()
+            logger.exception("❌ Token reward batch error")
+            return []
+
     def get_service_status(self) -> Dict:
-        """Get blockchain service status"""
+        """Get blockchain service status (reused for STATUS_CACHE_TTL seconds)"""
+        expires_at, status = self._status_cache
+        if status is not None and expires_at > time.monotonic():
+            return status
+        status = self._fetch_service_status()
+        self._status_cache = (time.monotonic() + STATUS_CACHE_TTL, status)
+        return status
+
+    def _fetch_service_status(self) -> Dict:
         try:
+            # One JSON-RPC batch (one round-trip); if it answers, the node is connected
+            with self.web3.batch_requests() as batch:
+                batch.add(self.web3.eth.get_block_number())
+                batch.add(self.web3.eth.get_balance(self.account.address))
+                latest_block, balance = batch.execute()
             return {
-                "web3_connected": self.web3.is_connected(),
-                "latest_block": self.web3.eth.block_number,
+                "web3_connected": True,
+                "latest_block": latest_block,
                 "account_address": self.account.address,
                 "user_registry_available": self.user_registry is not None,
                 "token_system_available": self.token_system is not None,
-                "account_balance": self.web3.eth.get_balance(self.account.address)
+                "account_balance": balance
             }
         except Exception as e:
             return {"error": str(e), "status": "unavailable"}
+
+
+@lru_cache(maxsize=None)
+def get_blockchain_service() -> BlockchainService:
+    """Process-wide service; raises (and is retried next call) while contracts are unconfigured"""
+    return BlockchainService()
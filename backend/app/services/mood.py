@@ -1,40 +1,109 @@
 from datetime import datetime, timezone, timedelta
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.models.user import MoodEntry
-from app.crypto.identity import AnonymousIdentity
-from app.ai.services.crisis_detector import CrisisDetector
-from app.ai.services.mood_analyzer import MoodAnalyzer
-from app.services.token_automation import TokenAutomationService
-from typing import List, Dict, Optional
-from fastapi import APIRouter, HTTPException
+from app.models.user import MoodEntry, User
+from app.database.connection import SessionLocal
+from app.crypto.identity import get_identity
+from app.ai.services.crisis_detector import get_crisis_detector
+from app.ai.services.mood_analyzer import get_mood_analyzer
+from app.services.token_automation import get_token_service
+from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from fastapi import BackgroundTasks, HTTPException
 import logging
+import re
+
+# Helplines returned with every HIGH-risk mood entry
+CRISIS_RESOURCES: Tuple[str, ...] = (
+    "🇮🇳 AASRA: 91-9820466726 (24/7 suicide prevention helpline)",
+    "🇮🇳 iCall: 9152987821 (Psychosocial support - TISS Mumbai)",
+    "🇮🇳 Vandrevala Foundation: 9999666555 (24/7 mental health helpline)",
+    "🇮🇳 Sumaitri: 011-23389090 (Delhi-based crisis helpline)",
+    "🇮🇳 Sneha Foundation: 044-24640050 (Chennai crisis helpline)",
+    "🇮🇳 Sahai: 080-25497777 (Bangalore emotional support)",
+    "🇮🇳 Roshni Trust: 040-66202000 (Hyderabad crisis helpline)",
+    "🇮🇳 Lifeline Foundation: 033-24637401 (Kolkata suicide prevention)",
+)
+
+# Used when the crisis detector fails - the entry is still saved
+_DEFAULT_CRISIS_ANALYSIS: Dict = {
+    'risk_level': 'MINIMAL',
+    'needs_intervention': False,
+    'recommendations': ['Continue monitoring your mood'],
+}
+
+# orjson is several times faster; stdlib json is the fallback
+try:
+    from orjson import dumps as _orjson_dumps, loads as _json_loads
+
+    def _json_dumps(value) -> str:
+        return _orjson_dumps(value).decode()
+except ImportError:
+    from json import dumps as _json_dumps, loads as _json_loads
+
+# Entries written before the JSON layout: "desc:...|triggers:...|notes:..."
+_LEGACY_MOOD_TEXT_RE = re.compile(r'desc:(.*?)\|triggers:(.*?)\|notes:(.*)', re.S)
+
+
+def _pack_mood_text(description: str, triggers: str, notes: str) -> str:
+    """Plaintext stored (encrypted) per entry: a JSON array, so '|' in user text is safe"""
+    return _json_dumps([description, triggers, notes])
+
+
+def _parse_mood_text(plain: str) -> Tuple[str, str, str]:
+    """Split decrypted mood text into (description, triggers, notes)"""
+    if plain.startswith('['):
+        description, triggers, notes = _json_loads(plain)
+        return description, triggers, notes
+    match = _LEGACY_MOOD_TEXT_RE.match(plain)
+    if match:
+        return match.groups()
+    return plain.replace('desc:', '', 1), "", ""
 
-router = APIRouter()
 
 class MoodService:
     def __init__(self):
-        self.identity_manager = AnonymousIdentity()
-        self.crisis_detector = CrisisDetector()
-        self.mood_analyzer = MoodAnalyzer()
-        self.token_service = TokenAutomationService()
+        self.identity_manager = get_identity()
+        self.crisis_detector = get_crisis_detector()
+        self.mood_analyzer = get_mood_analyzer()
+        self.token_service = get_token_service()
         self.logger = logging.getLogger(__name__)
     
-    def record_mood(self, user_commitment: str, mood_data: Dict, db: Session) -> Dict:
+    def record_mood(
+        self,
+        user_commitment: str,
+        mood_data: Dict,
+        db: Session,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Dict:
         """Record mood entry with AI crisis detection and reward processing"""
         try:
-            # Combine text for AI analysis
-            full_text = f"{mood_data.get('description', '')} {mood_data.get('triggers', '')} {mood_data.get('notes', '')}"
+            user_id = db.scalar(select(User.id).where(User.commitment == user_commitment))
+            if user_id is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            
+            description = mood_data.get('description', '')
+            triggers = mood_data.get('triggers') or ''
+            notes = mood_data.get('notes') or ''
             
-            # AI Crisis Detection
-            crisis_analysis = self.crisis_detector.analyze_text(full_text.strip())
+            # AI Crisis Detection on the combined text; a detector error still saves the entry
+            crisis_analysis = _DEFAULT_CRISIS_ANALYSIS
+            try:
+                crisis_analysis = self.crisis_detector.analyze_text(
+                    " ".join(part for part in (description, triggers, notes) if part)
+                )
+                self.logger.info("AI Analysis complete - Risk: %s", crisis_analysis.get('risk_level'))
+            except Exception as ai_error:
+                self.logger.warning("⚠️ AI analysis error: %s", ai_error)
             
             # Encrypt sensitive mood data for storage
             encrypted_data = self.identity_manager.encrypt_sensitive_data(
-                f"desc:{mood_data.get('description', '')}|triggers:{mood_data.get('triggers', '')}|notes:{mood_data.get('notes', '')}"
+                _pack_mood_text(description, triggers, notes)
             )
             
             # Create mood entry with AI-determined crisis flag
             mood_entry = MoodEntry(
+                user_id=user_id,
                 user_commitment=user_commitment,
                 encrypted_data=encrypted_data,
                 mood_score=mood_data.get("score", 5),
@@ -42,71 +111,74 @@ class MoodService:
                 timestamp=datetime.now(timezone.utc)
             )
             
+            # flush assigns the id; reading it before commit avoids a refresh SELECT
             db.add(mood_entry)
+            db.flush()
+            mood_entry_id = mood_entry.id
             db.commit()
-            db.refresh(mood_entry)
+            self.token_service.invalidate_activity_stats(user_commitment)
             
-            # Process token rewards (async in background)
+            # Process token rewards after the response when the route gives us
+            # BackgroundTasks - the reward submits a transaction
             try:
                 user_address = self._get_user_blockchain_address(user_commitment, db)
                 if user_address:
-                    self.token_service.process_mood_entry_reward(
-                        user_commitment, user_address, db
-                    )
+                    if background_tasks is not None:
+                        background_tasks.add_task(self._reward_mood_entry, user_commitment, user_address)
+                    else:
+                        self.token_service.process_mood_entry_reward(
+                            user_commitment, user_address, db
+                        )
             except Exception as reward_error:
                 self.logger.error(f"Token reward processing failed: {reward_error}")
             
-            # Get crisis resources if high risk
-            crisis_resources = []
-            if crisis_analysis.get("risk_level") == "HIGH":
-                crisis_resources = [
-                    "🇮🇳 AASRA: 91-9820466726 (24/7 suicide prevention helpline)",
-                    "🇮🇳 iCall: 9152987821 (Psychosocial support - TISS Mumbai)",
-                    "🇮🇳 Vandrevala Foundation: 9999666555 (24/7 mental health helpline)",
-                    "🇮🇳 Sumaitri: 011-23389090 (Delhi-based crisis helpline)",
-                    "🇮🇳 Sneha Foundation: 044-24640050 (Chennai crisis helpline)",
-                    "🇮🇳 Sahai: 080-25497777 (Bangalore emotional support)",
-                    "🇮🇳 Roshni Trust: 040-66202000 (Hyderabad crisis helpline)",
-                    "🇮🇳 Lifeline Foundation: 033-24637401 (Kolkata suicide prevention)"
-                ]
-                
-                self.logger.warning(f"🚨 Crisis intervention triggered for user: {user_commitment[:8]}...")
-                self.logger.warning(f"Risk level: {crisis_analysis.get('risk_level')}")
-            
-            return {
+            result = {
                 "message": "Mood recorded successfully",
-                "mood_entry_id": mood_entry.id,
+                "mood_entry_id": mood_entry_id,
                 "crisis_analysis": {
-                    "risk_level": crisis_analysis.get("risk_level", "UNKNOWN"),
+                    "risk_level": crisis_analysis.get("risk_level", "MINIMAL"),
                     "needs_intervention": crisis_analysis.get("needs_intervention", False),
-                    "recommendations": crisis_analysis.get("recommendations", [])
-                },
-                "crisis_resources": crisis_resources if crisis_resources else None
+                    "recommendations": crisis_analysis.get("recommendations", [])[:3]
+                }
             }
             
+            # Add crisis resources if high risk
+            if crisis_analysis.get("risk_level") == "HIGH":
+                result["crisis_resources"] = CRISIS_RESOURCES
+            
+            return result
+            
+        except HTTPException:
+            raise
         except Exception as e:
-            self.logger.error(f"Error recording mood: {e}")
+            self.logger.exception("Error recording mood")
             db.rollback()
             raise HTTPException(status_code=500, detail=f"Failed to record mood: {str(e)}")
     
     def get_mood_history(self, user_commitment: str, db: Session, limit: int = 30) -> List[Dict]:
         """Get user's mood history with decrypted data"""
         try:
-            entries = db.query(MoodEntry).filter(
-                MoodEntry.user_commitment == user_commitment
-            ).order_by(MoodEntry.timestamp.desc()).limit(limit).all()
+            # Read-only path: plain column rows, no ORM instances to build or track
+            entries = db.execute(
+                select(
+                    MoodEntry.id, MoodEntry.mood_score, MoodEntry.timestamp,
+                    MoodEntry.crisis_flag, MoodEntry.encrypted_data
+                ).where(
+                    MoodEntry.user_commitment == user_commitment
+                ).order_by(MoodEntry.timestamp.desc()).limit(limit)
+            ).all()
+            
+            # Decrypt sensitive data for user's own history in one pass
+            decrypted = self.identity_manager.decrypt_sensitive_data_batch(
+                [entry.encrypted_data for entry in entries]
+            )
             
             history = []
-            for entry in entries:
-                # Decrypt sensitive data for user's own history
-                try:
-                    decrypted = self.identity_manager.decrypt_sensitive_data(entry.encrypted_data)
-                    parts = decrypted.split('|')
-                    description = parts[0].replace('desc:', '') if len(parts) > 0 else ""
-                    triggers = parts[1].replace('triggers:', '') if len(parts) > 1 else ""
-                    notes = parts[2].replace('notes:', '') if len(parts) > 2 else ""
-                except:
+            for entry, plain in zip(entries, decrypted):
+                if plain is None:
                     description = triggers = notes = "[Encrypted]"
+                else:
+                    description, triggers, notes = _parse_mood_text(plain)
                 
                 history.append({
                     "id": entry.id,
@@ -158,6 +230,16 @@ class MoodService:
             self.logger.error(f"Error generating community insights: {e}")
             raise HTTPException(status_code=500, detail="Failed to generate community insights")
     
+    def _reward_mood_entry(self, user_commitment: str, user_address: str) -> None:
+        """Background reward - the request's session is closed by now, so open our own"""
+        db = SessionLocal()
+        try:
+            self.token_service.process_mood_entry_reward(user_commitment, user_address, db)
+        except Exception as e:
+            self.logger.error(f"Token reward processing failed: {e}")
+        finally:
+            db.close()
+    
     def _get_user_blockchain_address(self, user_commitment: str, db: Session) -> Optional[str]:
         """Get user's blockchain address for token rewards"""
         try:
@@ -172,13 +254,19 @@ class MoodService:
         """Helper to decrypt mood data for internal analysis"""
         try:
             decrypted = self.identity_manager.decrypt_sensitive_data(encrypted_data)
-            parts = decrypted.split('|')
+            description, triggers, notes = _parse_mood_text(decrypted)
             
             return {
-                "description": parts[0].replace('desc:', '') if len(parts) > 0 else "",
-                "triggers": parts[1].replace('triggers:', '') if len(parts) > 1 else "",
-                "notes": parts[2].replace('notes:', '') if len(parts) > 2 else ""
+                "description": description,
+                "triggers": triggers,
+                "notes": notes
             }
         except Exception as e:
             self.logger.error(f"Error decrypting mood data: {e}")
             return {"description": "", "triggers": "", "notes": ""}
+
+
+@lru_cache(maxsize=None)
+def get_mood_service() -> MoodService:
+    """Process-wide MoodService; its collaborators are singletons too"""
+    return MoodService()
@@ -1,54 +1,138 @@
 # backend/app/services/token_automation.py
 from datetime import datetime, timezone, timedelta
+from sqlalchemy import case, distinct, func, select
 from sqlalchemy.orm import Session
 from app.models.user import User, MoodEntry
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
+from functools import lru_cache
+from types import MappingProxyType
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+logger = logging.getLogger(__name__)
 
 try:
-    from app.services.blockchain_service import BlockchainService
-    from app.ai.services.mood_analyzer import MoodAnalyzer
-    from app.ai.services.crisis_detector import CrisisDetector
+    from app.services.blockchain_service import get_blockchain_service
+    from app.ai.services.mood_analyzer import get_mood_analyzer
+    from app.ai.services.crisis_detector import get_crisis_detector
     BLOCKCHAIN_ENABLED = True
 except ImportError as e:
-    print(f"⚠️ Blockchain/AI services not available: {e}")
+    logger.warning("⚠️ Blockchain/AI services not available: %s", e)
     BLOCKCHAIN_ENABLED = False
-    BlockchainService = None
-    MoodAnalyzer = None
-    CrisisDetector = None
+
+# Rewards are sent on-chain in rewardUsers batches: whichever comes first,
+# a full batch or REWARD_BATCH_WINDOW seconds after the first queued reward
+REWARD_BATCH_SIZE = 18
+REWARD_BATCH_WINDOW = 5.0
+REWARD_SENDER_WORKERS = 2
+
+# Recent-activity aggregates are reused within a day until the user logs a new
+# entry (invalidated in this process) or the TTL runs out (other workers)
+ACTIVITY_STATS_TTL = 300
+ACTIVITY_CACHE_MAX_USERS = 10000
+
+ZERO_ADDRESS = "0x" + "0" * 40
+
+# Seconds to wait before trying to build the blockchain/AI services again after a failure
+SERVICES_RETRY_BACKOFF = 30
+
+@lru_cache(maxsize=8)
+def _cutoff_at(days: int, minute: int) -> datetime:
+    return datetime.fromtimestamp(minute * 60, timezone.utc) - timedelta(days=days)
+
+def _utc_cutoff(days: int) -> datetime:
+    """now - days, rounded down to the minute so one datetime serves a whole batch"""
+    return _cutoff_at(days, int(time.time()) // 60)
+
+def _activity_stats_query(user_commitment: str, cutoff: datetime):
+    """
+    (distinct_days, avg_mood, crisis_count, entry_count) since cutoff - a range
+    scan on ix_mood_user_ts, no table scan or sort
+    """
+    return select(
+        func.count(distinct(MoodEntry.entry_date)),
+        func.avg(MoodEntry.mood_score),
+        func.coalesce(func.sum(case((MoodEntry.crisis_flag, 1), else_=0)), 0),
+        func.count()
+    ).where(
+        MoodEntry.user_commitment == user_commitment,
+        MoodEntry.timestamp >= cutoff
+    )
+
+@lru_cache(maxsize=1)
+def _make_services():
+    """(blockchain_service, mood_analyzer, crisis_detector), built on first use"""
+    # A constructor that raises is not cached - the next call retries
+    return get_blockchain_service(), get_mood_analyzer(), get_crisis_detector()
+
+_services_retry_at = 0.0  # time.monotonic() before which a failed build is not retried
+
+def _services():
+    """The cached services, or Nones while they are disabled or failing to build"""
+    global _services_retry_at
+    if not BLOCKCHAIN_ENABLED or time.monotonic() < _services_retry_at:
+        return None, None, None
+    try:
+        return _make_services()
+    except Exception as e:
+        # Back off so an unreachable node isn't re-dialled (and logged) on every access
+        _services_retry_at = time.monotonic() + SERVICES_RETRY_BACKOFF
+        logger.warning("Failed to initialize blockchain services, retrying in %ss: %s", SERVICES_RETRY_BACKOFF, e)
+        return None, None, None
+
+def warm_up_services() -> None:
+    """Build the blockchain/AI services ahead of the first request"""
+    _services()
 
 class TokenAutomationService:
+    __slots__ = (
+        'logger', '_pending_rewards', '_rewards_lock', '_flush_timer',
+        '_reward_senders', '_activity_cache'
+    )
+    
+    # Token reward amounts (read-only, shared by every instance)
+    rewards = MappingProxyType({
+        'mood_entry': 10,
+        'helpful_peer': 25,
+        'session_creation': 15,
+        'crisis_support': 50,
+        'consistent_logging': 20,
+        'community_contribution': 30
+    })
+    # Peer support amount per support_quality (unknown qualities earn 'helpful_peer')
+    peer_support_rewards = MappingProxyType({
+        'helpful': rewards['helpful_peer'],
+        'exceptional': int(rewards['helpful_peer'] * 1.5),
+        'crisis_intervention': rewards['crisis_support']
+    })
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        
-        # Initialize services if available
-        if BLOCKCHAIN_ENABLED:
-            try:
-                self.blockchain_service = BlockchainService()
-                self.mood_analyzer = MoodAnalyzer()
-                self.crisis_detector = CrisisDetector()
-            except Exception as e:
-                self.logger.warning(f"Failed to initialize blockchain services: {e}")
-                self.blockchain_service = None
-                self.mood_analyzer = None
-                self.crisis_detector = None
-        else:
-            self.blockchain_service = None
-            self.mood_analyzer = None
-            self.crisis_detector = None
-        
-        # Token reward amounts
-        self.rewards = {
-            'mood_entry': 10,
-            'helpful_peer': 25,
-            'session_creation': 15,
-            'crisis_support': 50,
-            'consistent_logging': 20,
-            'community_contribution': 30
-        }
-    
-    def process_mood_entry_reward(self, user_commitment: str, user_address: Optional[str], db: Session) -> Optional[str]:
-        """Reward user for mood tracking entry"""
+        self._pending_rewards = []  # (address, amount)
+        self._rewards_lock = threading.Lock()
+        self._flush_timer = None
+        self._reward_senders = ThreadPoolExecutor(
+            max_workers=REWARD_SENDER_WORKERS, thread_name_prefix="reward-sender"
+        )
+        self._activity_cache = {}  # commitment -> {(days, date): (expires_at, stats)}
+
+    # Resolved lazily so importing/constructing this service never touches the provider
+    @property
+    def blockchain_service(self):
+        return _services()[0]
+
+    @property
+    def mood_analyzer(self):
+        return _services()[1]
+
+    @property
+    def crisis_detector(self):
+        return _services()[2]
+    
+    def process_mood_entry_reward(self, user_commitment: str, user_address: Optional[str], db: Session) -> None:
+        """Queue the reward for a mood tracking entry; it goes out with the next reward batch"""
         try:
             # Basic mood entry reward
             base_reward = self.rewards['mood_entry']
@@ -56,48 +140,32 @@ class TokenAutomationService:
             # Check for consistency bonus
             if self._check_consistency_bonus(user_commitment, db):
                 base_reward += self.rewards['consistent_logging']
-                self.logger.info(f"Consistency bonus awarded to {user_commitment[:8]}...")
+                self.logger.info("Consistency bonus awarded to %s...", user_commitment[:8])
             
             # Reward user with tokens (if blockchain is available)
-            if self.blockchain_service and user_address:
-                tx_hash = self.blockchain_service.reward_user(user_address, base_reward)
-                if tx_hash:
-                    self.logger.info(f"Mood entry reward: {base_reward} tokens to {user_commitment[:8]}...")
-                    return tx_hash
+            if user_address and self.blockchain_service:
+                self.logger.info("Mood entry reward: %s tokens queued for %s...", base_reward, user_commitment[:8])
+                self._queue_reward(user_address, base_reward)
             else:
-                self.logger.info(f"Mood entry logged for {user_commitment[:8]}... (blockchain not available)")
-            
-            return None
+                self.logger.info("Mood entry logged for %s... (blockchain not available)", user_commitment[:8])
             
         except Exception as e:
-            self.logger.error(f"Error processing mood entry reward: {e}")
-            return None
+            self.logger.error("Error processing mood entry reward: %s", e)
     
-    def process_peer_support_reward(self, user_commitment: str, user_address: str, support_quality: str = 'helpful') -> Optional[str]:
-        """Reward user for providing peer support"""
+    def process_peer_support_reward(self, user_commitment: str, user_address: str, support_quality: str = 'helpful') -> None:
+        """Queue the reward for providing peer support"""
         try:
-            reward_amount = self.rewards['helpful_peer']
-            
-            # Adjust reward based on support quality
-            if support_quality == 'exceptional':
-                reward_amount = int(reward_amount * 1.5)
-            elif support_quality == 'crisis_intervention':
-                reward_amount = self.rewards['crisis_support']
-            
-            if self.blockchain_service:
-                tx_hash = self.blockchain_service.reward_user(user_address, reward_amount)
-                if tx_hash:
-                    self.logger.info(f"Peer support reward: {reward_amount} tokens to {user_commitment[:8]}...")
-                    return tx_hash
+            reward_amount = self.peer_support_rewards.get(support_quality, self.rewards['helpful_peer'])
             
-            return None
+            if user_address and self.blockchain_service:
+                self.logger.info("Peer support reward: %s tokens queued for %s...", reward_amount, user_commitment[:8])
+                self._queue_reward(user_address, reward_amount)
             
         except Exception as e:
-            self.logger.error(f"Error processing peer support reward: {e}")
-            return None
+            self.logger.error("Error processing peer support reward: %s", e)
     
-    def process_crisis_intervention_reward(self, user_commitment: str, user_address: Optional[str], intervention_data: Dict) -> Optional[str]:
-        """Reward users who successfully handle crisis situations"""
+    def process_crisis_intervention_reward(self, user_commitment: str, user_address: Optional[str], intervention_data: Dict) -> None:
+        """Queue the reward for users who successfully handle crisis situations"""
         try:
             reward_amount = self.rewards['crisis_support']
             
@@ -105,34 +173,108 @@ class TokenAutomationService:
             if intervention_data.get('helped_others', False):
                 reward_amount += 25
             
-            if self.blockchain_service and user_address:
-                tx_hash = self.blockchain_service.reward_user(user_address, reward_amount)
-                if tx_hash:
-                    self.logger.info(f"Crisis intervention reward: {reward_amount} tokens to {user_commitment[:8]}...")
-                    return tx_hash
-            
-            return None
+            if user_address and self.blockchain_service:
+                self.logger.info("Crisis intervention reward: %s tokens queued for %s...", reward_amount, user_commitment[:8])
+                self._queue_reward(user_address, reward_amount)
             
         except Exception as e:
-            self.logger.error(f"Error processing crisis intervention reward: {e}")
-            return None
+            self.logger.error("Error processing crisis intervention reward: %s", e)
+    
+    def _queue_reward(self, user_address: str, amount: int) -> None:
+        """
+        Add a reward to the pending batch and return immediately - the batch
+        is signed and sent by the reward sender pool, never on the caller's thread.
+        """
+        # Nothing to transfer - don't spend a batch slot (or an RPC call) on it
+        if amount <= 0 or not user_address or user_address.lower() == ZERO_ADDRESS:
+            return
+        with self._rewards_lock:
+            self._pending_rewards.append((user_address, amount))
+            if len(self._pending_rewards) < REWARD_BATCH_SIZE:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(REWARD_BATCH_WINDOW, self._flush_in_background)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+            batch = self._take_pending_rewards()
+        
+        self._reward_senders.submit(self._send_rewards, batch)
+    
+    def _flush_in_background(self) -> None:
+        with self._rewards_lock:
+            batch = self._take_pending_rewards()
+        if batch:
+            self._reward_senders.submit(self._send_rewards, batch)
+    
+    def _take_pending_rewards(self) -> List[tuple]:
+        """Detach the pending batch (caller holds _rewards_lock)"""
+        batch, self._pending_rewards = self._pending_rewards, []
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        return batch
+    
+    def flush_rewards(self) -> List[str]:
+        """Send every queued reward now on this thread (shutdown); returns the tx hashes sent"""
+        with self._rewards_lock:
+            batch = self._take_pending_rewards()
+        return self._send_rewards(batch)
+    
+    def shutdown_rewards(self) -> None:
+        """Send what is still queued and wait for in-flight batches"""
+        self.flush_rewards()
+        self._reward_senders.shutdown(wait=True)
+    
+    def _send_rewards(self, batch: List[tuple]) -> List[str]:
+        blockchain_service = self.blockchain_service
+        if not batch or not blockchain_service:
+            return []
+        # One transfer per address even if it earned several rewards
+        # (addresses compared case-insensitively; the first spelling is sent)
+        totals, spelling = {}, {}
+        for address, amount in batch:
+            key = address.lower()
+            spelling.setdefault(key, address)
+            totals[key] = totals.get(key, 0) + amount
+        try:
+            return blockchain_service.reward_users_batch(
+                [spelling[key] for key in totals], list(totals.values())
+            )
+        except Exception as e:
+            self.logger.error("Error sending reward batch: %s", e)
+            return []
+    
+    def _recent_activity_stats(self, user_commitment: str, db: Session, days: int = 7) -> Tuple[int, Optional[float], int, int]:
+        """
+        One aggregate query over the user's recent mood entries.
+        Returns: (distinct_days, avg_mood, crisis_count, entry_count)
+        """
+        key = (days, int(time.time()) // 86400)  # UTC day number
+        cached = self._activity_cache.get(user_commitment, {}).get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        cutoff_date = _utc_cutoff(days)
+        stats = tuple(db.execute(_activity_stats_query(user_commitment, cutoff_date)).one())
+        
+        if len(self._activity_cache) >= ACTIVITY_CACHE_MAX_USERS:
+            self._activity_cache.clear()
+        self._activity_cache[user_commitment] = {key: (time.monotonic() + ACTIVITY_STATS_TTL, stats)}
+        return stats
+    
+    def invalidate_activity_stats(self, user_commitment: str) -> None:
+        """Drop cached recent-activity stats after the user logs a mood entry"""
+        self._activity_cache.pop(user_commitment, None)
     
     def _check_consistency_bonus(self, user_commitment: str, db: Session) -> bool:
         """Check if user qualifies for consistency bonus"""
         try:
-            # Check if user has logged mood in last 7 days consistently
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
-            entries = db.query(MoodEntry).filter(
-                MoodEntry.user_commitment == user_commitment,
-                MoodEntry.timestamp >= cutoff_date
-            ).all()
-            
             # User gets bonus if they have entries on at least 5 of last 7 days
-            days_with_entries = len(set(entry.timestamp.date() for entry in entries))
+            days_with_entries, _, _, _ = self._recent_activity_stats(user_commitment, db)
             return days_with_entries >= 5
             
         except Exception as e:
-            self.logger.error(f"Error checking consistency bonus: {e}")
+            self.logger.error("Error checking consistency bonus: %s", e)
             return False
     
     def update_user_reputation(self, user_commitment: str, db: Session) -> Dict:
@@ -151,7 +293,7 @@ class TokenAutomationService:
             user.reputation_score = new_reputation
             db.commit()
             
-            self.logger.info(f"Reputation updated for {user_commitment[:8]}...: {old_reputation} → {new_reputation}")
+            self.logger.info("Reputation updated for %s...: %s → %s", user_commitment[:8], old_reputation, new_reputation)
             
             return {
                 'user_commitment': user_commitment,
@@ -161,7 +303,7 @@ class TokenAutomationService:
             }
             
         except Exception as e:
-            self.logger.error(f"Error updating user reputation: {e}")
+            self.logger.error("Error updating user reputation: %s", e)
             return {'error': str(e)}
     
     def _calculate_reputation_adjustment(self, user_commitment: str, db: Session) -> float:
@@ -170,34 +312,33 @@ class TokenAutomationService:
             adjustment = 0.0
             
             # Check recent mood entries (last 7 days)
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
-            recent_entries = db.query(MoodEntry).filter(
-                MoodEntry.user_commitment == user_commitment,
-                MoodEntry.timestamp >= cutoff_date
-            ).all()
+            _, avg_mood, crisis_count, entry_count = self._recent_activity_stats(user_commitment, db)
             
             # Positive adjustments
-            if len(recent_entries) >= 5:  # Consistent logging
+            if entry_count >= 5:  # Consistent logging
                 adjustment += 2.0
             
-            if len(recent_entries) > 0:
-                avg_mood = sum(entry.mood_score for entry in recent_entries) / len(recent_entries)
-                if avg_mood > 7:  # Good mood trend
-                    adjustment += 1.0
+            if entry_count > 0 and avg_mood > 7:  # Good mood trend
+                adjustment += 1.0
             
             # Check for crisis recovery
-            crisis_entries = [e for e in recent_entries if e.crisis_flag]
-            if len(crisis_entries) == 0 and len(recent_entries) > 0:
+            if crisis_count == 0 and entry_count > 0:
                 adjustment += 1.0  # No crisis episodes
             
             return min(5.0, adjustment)  # Cap at +5 points per update
             
         except Exception as e:
-            self.logger.error(f"Error calculating reputation adjustment: {e}")
+            self.logger.error("Error calculating reputation adjustment: %s", e)
             return 0.0
 
 
 # Legacy class alias for backward compatibility
 class AdvancedReputationService(TokenAutomationService):
     """Alias for TokenAutomationService to maintain backward compatibility"""
-    pass
+    __slots__ = ()
+
+
+@lru_cache(maxsize=None)
+def get_token_service() -> TokenAutomationService:
+    """Process-wide reward/reputation service"""
+    return TokenAutomationService()
@@ -1,9 +1,17 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from app.core.config import settings
+from app.core.log_config import setup_logging, shutdown_logging
+import asyncio
 import logging
-from datetime import datetime
+import orjson
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Configure logging before the routers import (they log on load)
+setup_logging()
 
 # Import all routers including the peer matching router
 from app.api.v1 import auth, sessions, mood, reputation
@@ -11,11 +19,11 @@ from app.routers import peer_matching
 
 # Import from database package
 from app.database import create_tables
+from app.api.deps import load_peer_service_class
+from app.services.token_automation import get_token_service, warm_up_services
 
 import uvicorn
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
@@ -24,7 +32,8 @@ app = FastAPI(
     description="Privacy-preserving mental health support network with AI-powered peer matching and crisis support",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
-    redoc_url=f"{settings.API_V1_STR}/redoc"
+    redoc_url=f"{settings.API_V1_STR}/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS - Enhanced for production
@@ -37,7 +46,8 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
+    # Explicit list: preflights are answered by set lookup instead of mirroring any header
+    allow_headers=["Authorization", "Content-Type", "Accept", "X-Requested-With"],
 )
 
 # Include all routers with proper prefixes and tags
@@ -77,7 +87,15 @@ app.include_router(
 async def on_startup():
     """Initialize application on startup"""
     try:
-        create_tables()
+        setup_logging()
+        # Schema checks are blocking DB round-trips - keep them off the event loop
+        await asyncio.to_thread(create_tables)
+        # Resolve the peer matching service once instead of on every request
+        app.state.peer_service_cls = load_peer_service_class()
+        # Build blockchain/AI services off the event loop so the first reward doesn't pay for it
+        app.state.services_warmup = asyncio.create_task(asyncio.to_thread(warm_up_services))
+        # FastAPI memoizes the schema in app.openapi_schema - build it now, not on the first docs hit
+        app.state.openapi_warmup = asyncio.create_task(asyncio.to_thread(app.openapi))
         logger.info("🚀 Sahāya liṅk Network - AI Enhanced Backend Started")
         logger.info("🔐 Privacy-first mental health support with blockchain security")
         logger.info("🤖 AI-powered peer matching and crisis detection enabled")
@@ -85,52 +103,115 @@ async def on_startup():
         logger.error(f"❌ Startup failed: {e}")
         raise
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Send queued token rewards and flush pending log records"""
+    # Only if the reward service was ever created - don't build it just to flush
+    if get_token_service.cache_info().currsize:
+        get_token_service().shutdown_rewards()
+    shutdown_logging()
+
+# Info payloads are static: encoded once at import, only the timestamp is spliced in
+def _timestamped_prefix(payload: dict) -> bytes:
+    """payload encoded without its closing brace, ready for a trailing timestamp"""
+    return orjson.dumps(payload)[:-1] + b',"timestamp":"'
+
+@lru_cache(maxsize=1)
+def _iso_at(second: int) -> str:
+    return datetime.fromtimestamp(second, timezone.utc).isoformat()
+
+def now_iso() -> str:
+    """Current UTC time in ISO format, built at most once per second"""
+    return _iso_at(int(time.time()))
+
+def _timestamped_response(prefix: bytes) -> Response:
+    body = prefix + now_iso().encode() + b'"}'
+    return Response(content=body, media_type="application/json")
+
+_ROOT_PREFIX = _timestamped_prefix({
+    "message": "Sahāya liṅk Network - Privacy-First Mental Health Support",
+    "version": settings.VERSION,
+    "features": [
+        "Anonymous user registration with blockchain commitment",
+        "AI-powered crisis detection and intervention",
+        "Intelligent peer matching with compatibility scoring",
+        "Privacy-preserving mood analytics",
+        "Anonymous peer support sessions",
+        "Blockchain-based reputation system",
+        "End-to-end encrypted communications"
+    ],
+    "privacy": "Zero personal data stored - Complete anonymity guaranteed",
+    "ai_components": [
+        "Crisis detection and early intervention",
+        "Peer compatibility matching",
+        "Mood pattern analysis",
+        "Personalized wellness recommendations"
+    ],
+    "status": "operational"
+})
+
+_HEALTH_PREFIX = _timestamped_prefix({
+    "status": "healthy",
+    "service": "sahaya-link-network",
+    "ai_components": "operational",
+    "blockchain": "connected",
+    "peer_matching": "enabled",
+    "crisis_detection": "active",
+    "privacy_level": "maximum"
+})
+
+_FEATURES_JSON = orjson.dumps({
+    "core_features": {
+        "authentication": "Blockchain-based anonymous registration",
+        "peer_matching": "AI-powered compatibility matching",
+        "crisis_support": "24/7 AI crisis detection and resources",
+        "mood_tracking": "Privacy-preserving analytics",
+        "peer_sessions": "Anonymous group and individual support",
+        "reputation": "Blockchain-secured community trust system"
+    },
+    "privacy_guarantees": [
+        "Zero personal data storage",
+        "Blockchain commitment-based identity",
+        "End-to-end encrypted communications",
+        "Anonymous peer interactions",
+        "No tracking or profiling"
+    ],
+    "ai_capabilities": [
+        "Crisis detection from mood patterns",
+        "Intelligent peer compatibility scoring",
+        "Personalized wellness recommendations",
+        "Real-time risk assessment",
+        "Anonymous community insights"
+    ]
+})
+
+_PRIVACY_JSON = orjson.dumps({
+    "privacy_architecture": "Zero-knowledge blockchain network",
+    "data_storage": "No personal identifiable information stored",
+    "user_identity": "Cryptographic commitment-based anonymous IDs",
+    "communication": "End-to-end encrypted peer interactions",
+    "ai_processing": "On-device and federated learning only",
+    "compliance": ["GDPR", "HIPAA-aligned", "Privacy-by-design"],
+    "audit_trail": "Blockchain-verified without personal data exposure",
+    "user_control": "Complete data sovereignty and deletion rights"
+})
+
 @app.get("/")
 async def root():
     """Root endpoint with platform information"""
-    return {
-        "message": "Sahāya liṅk Network - Privacy-First Mental Health Support",
-        "version": settings.VERSION,
-        "features": [
-            "Anonymous user registration with blockchain commitment",
-            "AI-powered crisis detection and intervention",
-            "Intelligent peer matching with compatibility scoring",
-            "Privacy-preserving mood analytics",
-            "Anonymous peer support sessions",
-            "Blockchain-based reputation system",
-            "End-to-end encrypted communications"
-        ],
-        "privacy": "Zero personal data stored - Complete anonymity guaranteed",
-        "ai_components": [
-            "Crisis detection and early intervention",
-            "Peer compatibility matching",
-            "Mood pattern analysis",
-            "Personalized wellness recommendations"
-        ],
-        "status": "operational",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return _timestamped_response(_ROOT_PREFIX)
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "service": "sahaya-link-network",
-        "ai_components": "operational",
-        "blockchain": "connected",
-        "peer_matching": "enabled",
-        "crisis_detection": "active",
-        "privacy_level": "maximum",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return _timestamped_response(_HEALTH_PREFIX)
 
 # Enhanced global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler with privacy-preserving logging"""
     # Log error while preserving user privacy
-    logger.error(f"⚠️ Server error on {request.method} {request.url.path}: {type(exc).__name__}")
+    logger.error("⚠️ Server error on %s %s: %s", request.method, request.url.path, type(exc).__name__)
     
     return JSONResponse(
         status_code=500,
@@ -138,51 +219,19 @@ async def global_exception_handler(request: Request, exc: Exception):
             "detail": "Internal server error occurred",
             "privacy_note": "No user data was compromised",
             "support": "Contact support if this persists",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now_iso()
         }
     )
 
 @app.get("/api/v1/features")
 async def get_platform_features():
     """Get comprehensive platform feature list"""
-    return {
-        "core_features": {
-            "authentication": "Blockchain-based anonymous registration",
-            "peer_matching": "AI-powered compatibility matching",
-            "crisis_support": "24/7 AI crisis detection and resources",
-            "mood_tracking": "Privacy-preserving analytics",
-            "peer_sessions": "Anonymous group and individual support",
-            "reputation": "Blockchain-secured community trust system"
-        },
-        "privacy_guarantees": [
-            "Zero personal data storage",
-            "Blockchain commitment-based identity",
-            "End-to-end encrypted communications",
-            "Anonymous peer interactions",
-            "No tracking or profiling"
-        ],
-        "ai_capabilities": [
-            "Crisis detection from mood patterns",
-            "Intelligent peer compatibility scoring",
-            "Personalized wellness recommendations",
-            "Real-time risk assessment",
-            "Anonymous community insights"
-        ]
-    }
+    return Response(content=_FEATURES_JSON, media_type="application/json")
 
 @app.get("/api/v1/privacy")
 async def get_privacy_info():
     """Get detailed privacy and security information"""
-    return {
-        "privacy_architecture": "Zero-knowledge blockchain network",
-        "data_storage": "No personal identifiable information stored",
-        "user_identity": "Cryptographic commitment-based anonymous IDs",
-        "communication": "End-to-end encrypted peer interactions",
-        "ai_processing": "On-device and federated learning only",
-        "compliance": ["GDPR", "HIPAA-aligned", "Privacy-by-design"],
-        "audit_trail": "Blockchain-verified without personal data exposure",
-        "user_control": "Complete data sovereignty and deletion rights"
-    }
+    return Response(content=_PRIVACY_JSON, media_type="application/json")
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -1,86 +1,102 @@
 #!/usr/bin/env python3
-import requests
-import json
-import time
+import asyncio
 import sys
+import httpx
 
 BASE_URL = "http://localhost:8000"
 token = None
 commitment = None
 
-def test_health_check():
+def _auth_headers():
+    return {"Authorization": f"Bearer {token}"}
+
+async def test_health_check(client: httpx.AsyncClient):
     print("🏥 Testing Health Check...")
-    response = requests.get(f"{BASE_URL}/health")
+    response = await client.get("/health")
     assert response.status_code == 200
     print("✅ Health check passed")
 
-def test_user_registration():
+async def test_features(client: httpx.AsyncClient):
+    print("🧩 Testing Features...")
+    response = await client.get("/api/v1/features")
+    assert response.status_code == 200
+    print("✅ Features retrieved")
+
+async def test_privacy(client: httpx.AsyncClient):
+    print("🔐 Testing Privacy Info...")
+    response = await client.get("/api/v1/privacy")
+    assert response.status_code == 200
+    print("✅ Privacy info retrieved")
+
+async def test_user_registration(client: httpx.AsyncClient):
     global token, commitment
     print("👤 Testing User Registration...")
-    
+
     data = {
         "age_range": "25-35",
         "topics": "anxiety, depression",
         "severity_level": "moderate",
         "preferred_times": ["morning", "evening"]
     }
-    
-    response = requests.post(f"{BASE_URL}/api/v1/auth/register", json=data)
+
+    # The endpoint only responds once the registration receipt is in, so no wait is needed after it
+    response = await client.post("/api/v1/auth/register", json=data)
     assert response.status_code == 200
-    
+
     result = response.json()
     token = result['access_token']
     commitment = result['commitment']
-    
+
     print(f"✅ User registered. Commitment: {commitment[:16]}...")
 
-def test_mood_recording():
+async def test_mood_recording(client: httpx.AsyncClient):
     print("🧠 Testing Mood Recording...")
-    
-    headers = {"Authorization": f"Bearer {token}"}
+
     data = {
         "score": 7,
         "description": "Feeling good today",
         "triggers": "good weather",
         "notes": "positive mood"
     }
-    
-    response = requests.post(f"{BASE_URL}/api/v1/mood/record", 
-                           json=data, headers=headers)
+
+    response = await client.post("/api/v1/mood/record", json=data, headers=_auth_headers())
     assert response.status_code == 200
     print("✅ Mood recorded successfully")
 
-def test_mood_analytics():
+async def test_mood_analytics(client: httpx.AsyncClient):
     print("📊 Testing Mood Analytics...")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(f"{BASE_URL}/api/v1/mood/analysis?days=7", 
-                          headers=headers)
+
+    response = await client.get("/api/v1/mood/analysis?days=7", headers=_auth_headers())
     assert response.status_code == 200
     print("✅ Mood analytics retrieved")
 
-def test_reputation():
+async def test_reputation(client: httpx.AsyncClient):
     print("⭐ Testing Reputation System...")
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(f"{BASE_URL}/api/v1/auth/user/{commitment}/reputation", 
-                          headers=headers)
+
+    response = await client.get(f"/api/v1/auth/user/{commitment}/reputation", headers=_auth_headers())
     assert response.status_code == 200
     print("✅ Reputation retrieved")
 
+async def _run(client: httpx.AsyncClient):
+    # Independent read-only checks run concurrently
+    await asyncio.gather(test_health_check(client), test_features(client), test_privacy(client))
+
+    # register -> record -> (analytics, reputation) depend on each other's data
+    await test_user_registration(client)
+    await test_mood_recording(client)
+    await asyncio.gather(test_mood_analytics(client), test_reputation(client))
+
 def run_all_tests():
     try:
-        test_health_check()
-        test_user_registration()
-        time.sleep(1)  # Allow blockchain transaction to process
-        test_mood_recording()
-        test_mood_analytics()
-        test_reputation()
-        
+        async def main():
+            async with httpx.AsyncClient(base_url=BASE_URL, timeout=30) as client:
+                await _run(client)
+        asyncio.run(main())
+
         print("\n🎉 ALL TESTS PASSED! 🎉")
         print(f"User Token: {token[:20]}...")
         print(f"User Commitment: {commitment}")
-        
+
     except Exception as e:
         print(f"❌ Test failed: {e}")
         sys.exit(1)
@@ -13,13 +13,24 @@ def test_blockchain_connection():
         blockchain = BlockchainService()
         print("✅ BlockchainService initialized")
         
-        # Test web3 connection
-        latest_block = blockchain.web3.eth.block_number
+        # Block number and both contracts' bytecode in one JSON-RPC batch
+        web3 = blockchain.web3
+        with web3.batch_requests() as batch:
+            batch.add(web3.eth.get_block_number())
+            batch.add(web3.eth.get_code(blockchain.user_registry.address))
+            batch.add(web3.eth.get_code(blockchain.token_system.address))
+            latest_block, registry_code, token_code = batch.execute()
         print(f"✅ Connected to blockchain. Latest block: {latest_block}")
         
         # Test contract loading
-        print(f"✅ UserRegistry contract: {blockchain.user_registry.address}")
-        print(f"✅ TokenSystem contract: {blockchain.token_system.address}")
+        for name, contract, code in (
+            ("UserRegistry", blockchain.user_registry, registry_code),
+            ("TokenSystem", blockchain.token_system, token_code),
+        ):
+            if not code:
+                print(f"❌ {name} has no code at {contract.address}")
+                return False
+            print(f"✅ {name} contract: {contract.address}")
         
         return True
     except Exception as e:
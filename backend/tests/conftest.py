@@ -0,0 +1,93 @@
+# backend/tests/conftest.py
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from main import app
+from app.database.connection import get_db
+from app.models.user import Base
+
+# Ephemeral PostgreSQL containers for the Postgres tests, when pytest-databases is installed
+try:
+    import pytest_databases  # noqa: F401
+    pytest_plugins = ["pytest_databases.docker.postgres"]
+except ImportError:
+    pass
+
+@pytest.fixture(scope="session")
+def engine():
+    """In-memory database, one shared connection, schema created once per run"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+        query_cache_size=1200
+    )
+
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # pysqlite manages transactions itself and breaks SAVEPOINT - let SQLAlchemy emit BEGIN
+        dbapi_connection.isolation_level = None
+        # Test data is disposable: no fsync, and temp b-trees (sorts, DISTINCT) stay in RAM
+        dbapi_connection.execute("PRAGMA synchronous=OFF")
+        dbapi_connection.execute("PRAGMA temp_store=MEMORY")
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    # Fresh in-memory database - nothing to check for before each CREATE
+    Base.metadata.create_all(bind=engine, checkfirst=False)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def connection(engine):
+    """Outer transaction per test - rolled back instead of dropping tables"""
+    conn = engine.connect()
+    trans = conn.begin()
+    yield conn
+    trans.rollback()
+    conn.close()
+
+@pytest.fixture
+def db_session(connection):
+    """Session inside the test's transaction; its commits only release a SAVEPOINT"""
+    session = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Async tests (pytest.mark.anyio) run on asyncio, like uvicorn"""
+    return "asyncio"
+
+@pytest.fixture
+async def client(db_session):
+    """In-process client straight on the ASGI app - no server, no sync-to-async thread hop"""
+    app.dependency_overrides[get_db] = lambda: db_session
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.pop(get_db, None)
+
+REGISTERED_USER_PAYLOAD = {
+    "age_range": "25-35",
+    "topics": "anxiety",
+    "severity_level": "mild",
+    "preferred_times": ["evening"]
+}
+
+@pytest.fixture
+def registration_payload():
+    """Body for POST /api/v1/auth/register"""
+    return dict(REGISTERED_USER_PAYLOAD)
+
+@pytest.fixture
+async def registered_user(client, registration_payload):
+    """Register an anonymous user; the registration response (commitment, access_token)"""
+    response = await client.post("/api/v1/auth/register", json=registration_payload)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+@pytest.fixture
+def auth_headers(registered_user):
+    return {"Authorization": f"Bearer {registered_user['access_token']}"}
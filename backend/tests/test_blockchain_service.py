@@ -0,0 +1,53 @@
+# backend/tests/test_blockchain_service.py
+from app.services import blockchain_service as bs
+
+VALID = ["0x" + "11" * 20, "0x" + "22" * 20]
+
+
+class _RewardUsers:
+    """Stands in for token_system.functions.rewardUsers; records what would be sent"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, addresses, amounts):
+        self.calls.append((addresses, amounts))
+        return self
+
+    def build_transaction(self, params):
+        return {"to": "0x" + "33" * 20, "value": 0, "data": "0x", "chainId": 31337,
+                "nonce": params["nonce"], "gas": params["gas"], "gasPrice": 1}
+
+
+class _TokenSystem:
+    abi = [{"type": "function", "name": "rewardUsers"}]
+
+    def __init__(self):
+        self.functions = type("Functions", (), {})()
+        self.functions.rewardUsers = _RewardUsers()
+
+
+class _Nonces:
+    def acquire(self):
+        return 0
+
+    def reset(self):
+        pass
+
+
+def test_reward_batch_skips_only_invalid_addresses(monkeypatch):
+    monkeypatch.setattr(bs, "fee_params", lambda: {})
+    monkeypatch.setattr(bs.receipt_confirmer, "submit", lambda tx_hash, label: None)
+    monkeypatch.setattr(bs.web3.eth, "send_raw_transaction", lambda raw: b"\xab" * 32)
+
+    service = bs.BlockchainService.__new__(bs.BlockchainService)
+    service.web3 = bs.web3
+    service.token_system = _TokenSystem()
+    service.account = bs._account_from_key("0x" + "a" * 64)
+    service._nonce_mgr = _Nonces()
+
+    tx_hashes = service.reward_users_batch([VALID[0], "not-an-address", VALID[1]], [10, 20, 30])
+
+    assert tx_hashes == ["0x" + "ab" * 32]
+    (addresses, amounts), = service.token_system.functions.rewardUsers.calls
+    assert [a.lower() for a in addresses] == VALID
+    assert amounts == [10, 30]
@@ -0,0 +1,7 @@
+# backend/tests/test_models.py
+from sqlalchemy import inspect
+
+def test_models(engine):
+    """Every model table is created (in-memory - never the app's database)"""
+    missing = {"users", "mood_entries", "peer_sessions", "session_matches"} - set(inspect(engine).get_table_names())
+    assert not missing, f"Tables not created: {sorted(missing)}"
@@ -0,0 +1,15 @@
+# backend/tests/test_query_plans.py
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.services.token_automation import _activity_stats_query
+
+def _plan(engine, stmt) -> str:
+    compiled = stmt.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+def test_recent_activity_stats_uses_user_timestamp_index(engine):
+    plan = _plan(engine, _activity_stats_query("0x" + "ab" * 32, datetime(2024, 1, 1, tzinfo=timezone.utc)))
+    assert "ix_mood_user_ts" in plan, plan
+    assert "SCAN mood_entries" not in plan, plan
@@ -13,6 +13,18 @@ contract TokenSystem {
     event Reward(address indexed recipient, uint256 amount);
 
     function reward(address recipient, uint256 amount) external {
+        _reward(recipient, amount);
+    }
+
+    // Pay several recipients in one transaction to amortize base gas
+    function rewardUsers(address[] calldata recipients, uint256[] calldata amounts) external {
+        require(recipients.length == amounts.length, "Length mismatch");
+        for (uint256 i = 0; i < recipients.length; i++) {
+            _reward(recipients[i], amounts[i]);
+        }
+    }
+
+    function _reward(address recipient, uint256 amount) internal {
         balances[recipient] += amount;
         totalSupply += amount;
         emit Reward(recipient, amount);
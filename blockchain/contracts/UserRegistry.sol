@@ -15,6 +15,17 @@ contract UserRegistry {
     event UserRegistered(bytes32 indexed commitment);
     
     function registerUser(bytes32 _commitment) external {
+        _register(_commitment);
+    }
+
+    // Register several commitments in one transaction to amortize base gas
+    function registerUsers(bytes32[] calldata _commitments) external {
+        for (uint256 i = 0; i < _commitments.length; i++) {
+            _register(_commitments[i]);
+        }
+    }
+
+    function _register(bytes32 _commitment) internal {
         require(!users[_commitment].active, "User already registered");
         users[_commitment] = User(_commitment, 100, block.timestamp, true);
         emit UserRegistered(_commitment);